@@ -1,14 +1,22 @@
 import os
 import tempfile
-import shutil
 import json
+import hashlib
+import asyncio
+import inspect
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
-from transcriber import WhisperAPITranscriber, log
+from transcriber import (
+    WhisperAPITranscriber, log, media_url_error, MAX_CONCURRENT_CHUNKS, ADAPTIVE_MAX_CONCURRENCY,
+    TRANSCRIPTION_MODES, MAX_SPEEDUP
+)
+from async_transcriber import AsyncWhisperAPITranscriber
 
 # Configuration management
 CONFIG_FILE = "transcription_config.json"
@@ -17,7 +25,13 @@ CONFIG_FILE = "transcription_config.json"
 DEFAULT_CONFIG = {
     "base_url": os.getenv("BASE_URL", "https://api.openai.com/v1"),
     "models": ["whisper-1", "distil-whisper-large-v3-en"],
-    "default_model": "whisper-1"
+    "default_model": "whisper-1",
+    "max_concurrent_chunks": MAX_CONCURRENT_CHUNKS,
+    "adaptive_max_concurrency": ADAPTIVE_MAX_CONCURRENCY,
+    "async_engine": False,
+    "hedged_requests": False,
+    "youtube_parallel_videos": 3,
+    "media_url_allowed_hosts": []
 }
 
 # Load or create configuration
@@ -52,6 +66,7 @@ BASE_URL = config["base_url"]
 # Configuration
 DEBUG = True
 DEFAULT_OUTPUT_DIR = "outputs"
+JOB_WORKER_THREADS = 40  # Sync-engine jobs run at once, as many as Starlette's default thread limit
 SUPPORTED_AUDIO_FORMATS = [".mp3", ".mp4", ".mpeg", ".mpga", ".m4a", ".wav", ".webm"]
 os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
 
@@ -75,6 +90,10 @@ app.add_middleware(
 # In-memory store for job status
 job_status = {}
 
+# Sync-engine jobs get their own threads, so long jobs can't use up the event loop's
+# default executor that request handlers like /youtube-info rely on
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKER_THREADS, thread_name_prefix="transcription-job")
+
 # Models for API requests and responses
 class TranscriptionRequest(BaseModel):
     api_key: str
@@ -92,6 +111,25 @@ class YouTubeRequest(BaseModel):
     language: Optional[str] = "Automatic Detection"
     translate: Optional[bool] = False
     timestamp: Optional[bool] = True
+    mode: Optional[str] = "standard"  # "latency" splits files into parallel chunks for faster turnaround
+    remove_silence: Optional[bool] = False  # Cut long pauses out before upload
+    speedup: Optional[float] = 1.0  # Playback speed applied before upload, up to MAX_SPEEDUP
+
+class UrlRequest(BaseModel):
+    api_key: str
+    media_url: str  # Direct http(s) link to an audio or video file
+    model: Optional[str] = None  # Use default_model from config if not specified
+    base_url: Optional[str] = None  # Optional base URL override
+    language: Optional[str] = "Automatic Detection"
+    translate: Optional[bool] = False
+    timestamp: Optional[bool] = True
+    mode: Optional[str] = "standard"  # "latency" splits files into parallel chunks for faster turnaround
+    remove_silence: Optional[bool] = False  # Cut long pauses out before upload
+    speedup: Optional[float] = 1.0  # Playback speed applied before upload, up to MAX_SPEEDUP
+
+class RetryRequest(BaseModel):
+    api_key: str
+    base_url: Optional[str] = None  # Optional base URL override
 
 class TranscriptionResponse(BaseModel):
     job_id: str
@@ -107,6 +145,12 @@ class ConfigModel(BaseModel):
     base_url: Optional[str] = None
     models: Optional[List[str]] = None
     default_model: Optional[str] = None
+    max_concurrent_chunks: Optional[int] = None
+    adaptive_max_concurrency: Optional[int] = None
+    async_engine: Optional[bool] = None
+    hedged_requests: Optional[bool] = None
+    youtube_parallel_videos: Optional[int] = None
+    media_url_allowed_hosts: Optional[List[str]] = None
 
 # Helper functions
 def generate_job_id():
@@ -122,32 +166,68 @@ def update_job_status(job_id: str, status: str, message: str, result=None):
         "result": result
     }
 
+def completion_message(result):
+    """Build the status message for a finished transcription result"""
+    message = f"Transcription completed in {result['elapsed_time']:.2f} seconds"
+    if result.get("failed_chunks"):
+        message += f" with {len(result['failed_chunks'])} failed chunks that can be retried"
+    return message
+
+def validate_transcription_options(mode: str, speedup: float):
+    """Reject a transcription mode or speedup the transcriber doesn't support"""
+    if mode not in TRANSCRIPTION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode. Available modes: {', '.join(TRANSCRIPTION_MODES)}"
+        )
+    
+    if not 1 <= speedup <= MAX_SPEEDUP:
+        raise HTTPException(status_code=400, detail=f"speedup must be between 1 and {MAX_SPEEDUP}")
+
+def create_transcriber(api_key: str, base_url: Optional[str]):
+    """Create the configured transcription engine for a job"""
+    # Use provided base_url or from config
+    actual_base_url = base_url if base_url else config["base_url"]
+    log(f"Using base URL: {actual_base_url}")
+    
+    engine = AsyncWhisperAPITranscriber if config.get("async_engine") else WhisperAPITranscriber
+    return engine(
+        api_key, actual_base_url,
+        max_concurrent_chunks=config.get("max_concurrent_chunks", MAX_CONCURRENT_CHUNKS),
+        adaptive_max_concurrency=config.get("adaptive_max_concurrency", ADAPTIVE_MAX_CONCURRENCY),
+        hedged_requests=config.get("hedged_requests", False),
+        media_url_allowed_hosts=config.get("media_url_allowed_hosts", [])
+    )
+
+async def call_transcriber(method, *args, **kwargs):
+    """Await an async engine method, or run a sync one on the job executor"""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(job_executor, functools.partial(method, *args, **kwargs))
+
 # Background task functions
-def process_file_transcription(job_id: str, file_path: str, api_key: str, model: str, 
-                              base_url: Optional[str], language: str, translate: bool, timestamp: bool):
+async def process_file_transcription(job_id: str, file_path: str, api_key: str, model: str, 
+                                    base_url: Optional[str], language: str, translate: bool, timestamp: bool,
+                                    audio_hash: Optional[str] = None, mode: str = "standard",
+                                    remove_silence: bool = False, speedup: float = 1.0):
     """Process file transcription in the background"""
     try:
         update_job_status(job_id, "processing", "Transcription in progress...")
         
-        # Use provided base_url or from config
-        actual_base_url = base_url if base_url else config["base_url"]
-        log(f"Using base URL: {actual_base_url}")
-        
-        transcriber = WhisperAPITranscriber(api_key, actual_base_url)
-        result = transcriber.transcribe_file(
-            file_path, model, language, translate, timestamp
+        transcriber = create_transcriber(api_key, base_url)
+        result = await call_transcriber(
+            transcriber.transcribe_file, file_path, model, language, translate, timestamp,
+            audio_hash=audio_hash, mode=mode, remove_silence=remove_silence, speedup=speedup
         )
         
         if "error" in result:
-            update_job_status(job_id, "error", f"Error: {result['error']}")
+            # Keep the checkpoint details so failed chunks can still be retried
+            update_job_status(job_id, "error", f"Error: {result['error']}",
+                              result if result.get("failed_chunks") else None)
             return
         
-        update_job_status(
-            job_id, 
-            "completed", 
-            f"Transcription completed in {result['elapsed_time']:.2f} seconds",
-            result
-        )
+        update_job_status(job_id, "completed", completion_message(result), result)
     except Exception as e:
         log(f"Error in process_file_transcription: {str(e)}")
         update_job_status(job_id, "error", f"Error: {str(e)}")
@@ -160,35 +240,133 @@ def process_file_transcription(job_id: str, file_path: str, api_key: str, model:
         except Exception as e:
             log(f"Error removing temporary file: {str(e)}")
 
-def process_youtube_transcription(job_id: str, youtube_url: str, api_key: str, model: str, 
-                                 base_url: Optional[str], language: str, translate: bool, timestamp: bool):
-    """Process YouTube transcription in the background"""
+async def process_youtube_transcription(job_id: str, youtube_url: str, api_key: str, model: str, 
+                                       base_url: Optional[str], language: str, translate: bool, timestamp: bool,
+                                       mode: str = "standard", remove_silence: bool = False,
+                                       speedup: float = 1.0, expand_playlists: bool = True):
+    """Process YouTube transcription in the background
+    
+    Playlist and channel links are expanded into one child job per video.
+    """
     try:
         update_job_status(job_id, "processing", "Downloading YouTube video...")
         
-        # Use provided base_url or from config
-        actual_base_url = base_url if base_url else config["base_url"]
-        log(f"Using base URL: {actual_base_url}")
+        transcriber = create_transcriber(api_key, base_url)
+        if expand_playlists:
+            playlist = await call_transcriber(transcriber.expand_youtube, youtube_url)
+            if playlist is not None:
+                await process_youtube_playlist(
+                    job_id, playlist, api_key, model, base_url, language, translate, timestamp,
+                    mode, remove_silence, speedup
+                )
+                return
         
-        transcriber = WhisperAPITranscriber(api_key, actual_base_url)
-        result = transcriber.transcribe_youtube(
-            youtube_url, model, language, translate, timestamp
+        result = await call_transcriber(
+            transcriber.transcribe_youtube, youtube_url, model, language, translate, timestamp,
+            mode=mode, remove_silence=remove_silence, speedup=speedup
         )
         
         if "error" in result:
-            update_job_status(job_id, "error", f"Error: {result['error']}")
+            # Keep the checkpoint details so failed chunks can still be retried
+            update_job_status(job_id, "error", f"Error: {result['error']}",
+                              result if result.get("failed_chunks") else None)
             return
         
-        update_job_status(
-            job_id, 
-            "completed", 
-            f"Transcription completed in {result['elapsed_time']:.2f} seconds",
-            result
-        )
+        update_job_status(job_id, "completed", completion_message(result), result)
     except Exception as e:
         log(f"Error in process_youtube_transcription: {str(e)}")
         update_job_status(job_id, "error", f"Error: {str(e)}")
 
+async def process_url_transcription(job_id: str, media_url: str, api_key: str, model: str,
+                                    base_url: Optional[str], language: str, translate: bool, timestamp: bool,
+                                    mode: str = "standard", remove_silence: bool = False,
+                                    speedup: float = 1.0):
+    """Process remote media URL transcription in the background"""
+    try:
+        update_job_status(job_id, "processing", "Streaming remote media...")
+        
+        transcriber = create_transcriber(api_key, base_url)
+        result = await call_transcriber(
+            transcriber.transcribe_url, media_url, model, language, translate, timestamp,
+            mode=mode, remove_silence=remove_silence, speedup=speedup
+        )
+        
+        if "error" in result:
+            # Keep the checkpoint details so failed chunks can still be retried
+            update_job_status(job_id, "error", f"Error: {result['error']}",
+                              result if result.get("failed_chunks") else None)
+            return
+        
+        update_job_status(job_id, "completed", completion_message(result), result)
+    except Exception as e:
+        log(f"Error in process_url_transcription: {str(e)}")
+        update_job_status(job_id, "error", f"Error: {str(e)}")
+
+async def process_youtube_playlist(job_id: str, playlist: Dict[str, Any], api_key: str, model: str,
+                                   base_url: Optional[str], language: str, translate: bool, timestamp: bool,
+                                   mode: str, remove_silence: bool, speedup: float):
+    """Transcribe each video of an expanded playlist or channel as a child job of job_id
+    
+    Each child has its own job ID for /status and /download, listed in the
+    parent's result. At most youtube_parallel_videos children run at once.
+    """
+    children = []
+    for video in playlist["videos"]:
+        child_id = generate_job_id()
+        update_job_status(child_id, "queued", "Job queued for processing")
+        children.append({"job_id": child_id, "url": video["url"], "title": video["title"]})
+    
+    result = {"title": playlist["title"], "children": children}
+    if not children:
+        update_job_status(job_id, "error", "Error: Playlist has no videos", result)
+        return
+    
+    update_job_status(job_id, "processing", f"Transcribing {len(children)} videos...", result)
+    parallel_videos = config.get("youtube_parallel_videos", DEFAULT_CONFIG["youtube_parallel_videos"])
+    semaphore = asyncio.Semaphore(max(1, parallel_videos))
+    finished = 0
+    
+    async def transcribe_child(child):
+        nonlocal finished
+        async with semaphore:
+            await process_youtube_transcription(
+                child["job_id"], child["url"], api_key, model, base_url, language, translate, timestamp,
+                mode, remove_silence, speedup, expand_playlists=False
+            )
+        finished += 1
+        update_job_status(job_id, "processing", f"Transcribed {finished} of {len(children)} videos...", result)
+    
+    await asyncio.gather(*(transcribe_child(child) for child in children))
+    
+    failed = [child for child in children if job_status[child["job_id"]]["status"] == "error"]
+    message = f"Transcribed {len(children) - len(failed)} of {len(children)} videos"
+    if failed:
+        message += f", {len(failed)} failed"
+    update_job_status(job_id, "error" if len(failed) == len(children) else "completed", message, result)
+
+async def process_chunk_retry(job_id: str, checkpoint_id: str, api_key: str, base_url: Optional[str],
+                              previous_result: Dict[str, Any]):
+    """Re-transcribe the failed chunks of a finished job in the background"""
+    try:
+        update_job_status(job_id, "processing", "Retrying failed chunks...", previous_result)
+        
+        transcriber = create_transcriber(api_key, base_url)
+        result = await call_transcriber(transcriber.resume_transcription, checkpoint_id)
+        
+        if "error" in result:
+            update_job_status(job_id, "error", f"Error: {result['error']}", previous_result)
+            return
+        
+        # Keep YouTube details from the original result
+        for key in ("title", "thumbnail_url"):
+            if key in previous_result:
+                result[key] = previous_result[key]
+        
+        update_job_status(job_id, "completed", completion_message(result), result)
+    except Exception as e:
+        log(f"Error in process_chunk_retry: {str(e)}")
+        update_job_status(job_id, "error", f"Error: {str(e)}", previous_result)
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -219,7 +397,10 @@ async def transcribe_file(
     base_url: Optional[str] = Form(None),
     language: Optional[str] = Form("Automatic Detection"),
     translate: Optional[bool] = Form(False),
-    timestamp: Optional[bool] = Form(True)
+    timestamp: Optional[bool] = Form(True),
+    mode: Optional[str] = Form("standard"),
+    remove_silence: Optional[bool] = Form(False),
+    speedup: Optional[float] = Form(1.0)
 ):
     """Transcribe an audio file"""
     try:
@@ -233,6 +414,8 @@ async def transcribe_file(
                 status_code=400, 
                 detail=f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_AUDIO_FORMATS)}"
             )
+        
+        validate_transcription_options(mode, speedup)
             
         # Use default model if not specified
         actual_model = model if model else config["default_model"]
@@ -248,27 +431,34 @@ async def transcribe_file(
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
         temp_file_path = temp_file.name
         
-        # Write content to temporary file
+        # Write content to temporary file, hashing it on the way for the transcript cache
+        hasher = hashlib.sha256()
         with open(temp_file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+            for block in iter(lambda: file.file.read(1024 * 1024), b""):
+                hasher.update(block)
+                f.write(block)
+        audio_hash = hasher.hexdigest()
         
         # Start background processing
         update_job_status(job_id, "queued", "Job queued for processing")
         
         background_tasks.add_task(
             process_file_transcription,
-            job_id, temp_file_path, api_key, actual_model, base_url, language, translate, timestamp
+            job_id, temp_file_path, api_key, actual_model, base_url, language, translate, timestamp,
+            audio_hash, mode, remove_silence, speedup
         )
         
         return {"job_id": job_id, "status": "queued", "message": "Transcription job has been queued"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         log(f"Error in transcribe_file endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/transcribe/youtube", response_model=TranscriptionResponse)
 async def transcribe_youtube(background_tasks: BackgroundTasks, request: YouTubeRequest):
-    """Transcribe a YouTube video"""
+    """Transcribe a YouTube video, or every video of a playlist or channel"""
     try:
         # Generate a job ID
         job_id = generate_job_id()
@@ -283,21 +473,89 @@ async def transcribe_youtube(background_tasks: BackgroundTasks, request: YouTube
                 detail=f"Invalid model. Available models: {', '.join(config['models'])}"
             )
         
+        validate_transcription_options(request.mode, request.speedup)
+        
         # Start background processing
         update_job_status(job_id, "queued", "Job queued for processing")
         
         background_tasks.add_task(
             process_youtube_transcription,
             job_id, request.youtube_url, request.api_key, model,
-            request.base_url, request.language, request.translate, request.timestamp
+            request.base_url, request.language, request.translate, request.timestamp,
+            request.mode, request.remove_silence, request.speedup
         )
         
         return {"job_id": job_id, "status": "queued", "message": "YouTube transcription job has been queued"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         log(f"Error in transcribe_youtube endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/transcribe/url", response_model=TranscriptionResponse)
+async def transcribe_url(background_tasks: BackgroundTasks, request: UrlRequest):
+    """Transcribe audio or video from a direct media URL, streaming it instead of buffering it"""
+    try:
+        # Generate a job ID
+        job_id = generate_job_id()
+        
+        # Refuse internal addresses and hosts outside media_url_allowed_hosts before queueing
+        error = await asyncio.to_thread(media_url_error, request.media_url, config.get("media_url_allowed_hosts"))
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+        
+        # Use default model if not specified
+        model = request.model or config["default_model"]
+        
+        # Validate model exists in configured models if not using custom base_url
+        if not request.base_url and model not in config["models"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid model. Available models: {', '.join(config['models'])}"
+            )
+        
+        validate_transcription_options(request.mode, request.speedup)
+        
+        # Start background processing
+        update_job_status(job_id, "queued", "Job queued for processing")
+        
+        background_tasks.add_task(
+            process_url_transcription,
+            job_id, request.media_url, request.api_key, model,
+            request.base_url, request.language, request.translate, request.timestamp,
+            request.mode, request.remove_silence, request.speedup
+        )
+        
+        return {"job_id": job_id, "status": "queued", "message": "URL transcription job has been queued"}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        log(f"Error in transcribe_url endpoint: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/retry/{job_id}", response_model=TranscriptionResponse)
+async def retry_failed_chunks(job_id: str, background_tasks: BackgroundTasks, request: RetryRequest):
+    """Retry the failed chunks of a finished chunked transcription"""
+    if job_id not in job_status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    job = job_status[job_id]
+    result = job.get("result") or {}
+    
+    if job["status"] not in ("completed", "error") or not result.get("failed_chunks"):
+        raise HTTPException(status_code=400, detail="Job has no failed chunks to retry")
+    
+    update_job_status(job_id, "queued", "Retry of failed chunks queued", result)
+    
+    background_tasks.add_task(
+        process_chunk_retry,
+        job_id, result["checkpoint_id"], request.api_key, request.base_url, result
+    )
+    
+    return {"job_id": job_id, "status": "queued", "message": "Retry of failed chunks has been queued"}
+
 @app.get("/status/{job_id}", response_model=TranscriptionStatusResponse)
 async def get_job_status(job_id: str):
     """Get the status of a transcription job"""
@@ -334,21 +592,15 @@ async def download_result(job_id: str):
 
 @app.get("/youtube-info")
 async def get_youtube_info(url: str):
-    """Get information about a YouTube video"""
+    """Get information about a YouTube video, without downloading it"""
     try:
         transcriber = WhisperAPITranscriber("dummy_key", config["base_url"])  # API key not needed for this operation
-        result = transcriber.download_youtube(url)
+        # A quick metadata lookup, so it stays off the job executor and never queues behind jobs
+        result = await asyncio.to_thread(transcriber.youtube_info, url)
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         
-        # Clean up the downloaded file
-        if "temp_dir" in result:
-            try:
-                shutil.rmtree(result["temp_dir"], ignore_errors=True)
-            except Exception as e:
-                log(f"Error removing temporary directory: {str(e)}")
-        
         return {
             "title": result.get("title", "YouTube Video"),
             "thumbnail_url": result.get("thumbnail_url", None)
@@ -387,6 +639,32 @@ async def update_config(new_config: ConfigModel):
                 detail=f"Default model must be in the list of available models: {', '.join(config['models'])}"
             )
     
+    if new_config.max_concurrent_chunks is not None:
+        if new_config.max_concurrent_chunks < 1:
+            raise HTTPException(status_code=400, detail="max_concurrent_chunks must be at least 1")
+        config["max_concurrent_chunks"] = new_config.max_concurrent_chunks
+    
+    if new_config.adaptive_max_concurrency is not None:
+        if new_config.adaptive_max_concurrency < 1:
+            raise HTTPException(status_code=400, detail="adaptive_max_concurrency must be at least 1")
+        config["adaptive_max_concurrency"] = new_config.adaptive_max_concurrency
+    
+    if new_config.async_engine is not None:
+        config["async_engine"] = new_config.async_engine
+    
+    if new_config.hedged_requests is not None:
+        config["hedged_requests"] = new_config.hedged_requests
+    
+    if new_config.youtube_parallel_videos is not None:
+        if new_config.youtube_parallel_videos < 1:
+            raise HTTPException(status_code=400, detail="youtube_parallel_videos must be at least 1")
+        config["youtube_parallel_videos"] = new_config.youtube_parallel_videos
+    
+    if new_config.media_url_allowed_hosts is not None:
+        config["media_url_allowed_hosts"] = [
+            host.strip().lower() for host in new_config.media_url_allowed_hosts if host.strip()
+        ]
+    
     # Save to file
     if save_config(config):
         return {"message": "Configuration updated successfully", "config": config}
@@ -0,0 +1,249 @@
+import os
+import tempfile
+import subprocess
+import csv
+import asyncio
+import weakref
+import functools
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from transcriber import WhisperAPITranscriber, log, HTTP_POOL_SIZE, HTTP_KEEPALIVE_SECONDS
+
+BLOCKING_WORKER_THREADS = 32  # Threads for the blocking calls of async jobs: hashing, yt-dlp, downloads, locks
+
+# Blocking calls get the engine's own threads rather than the loop's default executor,
+# which the API's request handlers share
+_blocking_executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKER_THREADS, thread_name_prefix="async-transcriber")
+
+async def run_blocking(func, *args):
+    """Run a blocking call on the engine's worker threads and await its result"""
+    return await asyncio.get_running_loop().run_in_executor(_blocking_executor, functools.partial(func, *args))
+
+# One httpx.AsyncClient per event loop and base URL; clients can't be shared across loops
+_clients = weakref.WeakKeyDictionary()
+
+def get_async_client(base_url):
+    """Return the pooled httpx.AsyncClient for an API base URL on the running loop"""
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = loop_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_SIZE,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            ),
+            timeout=300  # 5-minute timeout
+        )
+        loop_clients[base_url] = client
+        log(f"Created async HTTP client for {base_url} with pool size {HTTP_POOL_SIZE}")
+    return client
+
+class AsyncWhisperAPITranscriber(WhisperAPITranscriber):
+    """asyncio version of WhisperAPITranscriber with the same methods as coroutines
+
+    The transcription control flow is inherited; only its I/O primitives are
+    replaced. API calls use a pooled httpx.AsyncClient, ffmpeg and ffprobe
+    run through asyncio.create_subprocess_exec, and hashing, downloads and
+    yt-dlp go to worker threads, so one event loop can drive many concurrent
+    chunk uploads without a thread per request.
+    """
+
+    _retryable_errors = (httpx.TransportError,)
+    _client_errors = (httpx.HTTPError,)
+
+    async def transcribe_file(self, file_path, model, language=None,
+                              translate=False, timestamp=True, audio_hash=None, mode="standard",
+                              remove_silence=False, speedup=1.0):
+        """Transcribe an audio file using Whisper API, reusing cached transcripts of identical audio"""
+        return await self._transcribe_cached(
+            file_path, model, language, translate, timestamp, audio_hash, mode, remove_silence, speedup
+        )
+
+    async def transcribe_url(self, media_url, model, language=None, translate=False, timestamp=True,
+                             mode="standard", remove_silence=False, speedup=1.0):
+        """Transcribe remote media from an HTTP(S) URL, streaming anything over the size limit"""
+        return await self._transcribe_url(
+            media_url, model, language, translate, timestamp, mode, remove_silence, speedup
+        )
+
+    async def resume_transcription(self, checkpoint_id, timestamp=True):
+        """Re-transcribe the chunks of a checkpointed job that have no result yet"""
+        return await self._resume_transcription(checkpoint_id, timestamp)
+
+    async def probe(self, file_path):
+        """Describe a media file with a single, cached ffprobe call"""
+        return await self._probe(file_path)
+
+    async def download_youtube(self, youtube_link):
+        """Download a YouTube video's audio and return the path to the file"""
+        return await self._download_youtube(youtube_link)
+
+    async def transcribe_youtube(self, youtube_link, model, language=None,
+                                 translate=False, timestamp=True, mode="standard",
+                                 remove_silence=False, speedup=1.0):
+        """Download a YouTube video and transcribe its audio"""
+        return await self._transcribe_youtube(
+            youtube_link, model, language, translate, timestamp, mode, remove_silence, speedup
+        )
+
+    async def _run_command(self, cmd):
+        """Run an external command without blocking the event loop, capturing its text output"""
+        log(f"Running command: {' '.join(cmd)}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        return subprocess.CompletedProcess(
+            cmd,
+            process.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace")
+        )
+
+    async def _command_rows(self, cmd):
+        """Run a command, yielding the CSV rows it prints on stdout as they are written"""
+        log(f"Running command: {' '.join(cmd)}")
+        with tempfile.TemporaryFile() as stderr_file:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=stderr_file
+            )
+            finished = False
+            try:
+                while True:
+                    line = await process.stdout.readline()
+                    if not line:
+                        break
+                    for row in csv.reader([line.decode("utf-8", errors="replace")]):
+                        yield row
+                finished = True
+            finally:
+                if not finished and process.returncode is None:
+                    try:
+                        process.kill()
+                    except ProcessLookupError:
+                        pass
+                await process.wait()
+
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                log(f"{cmd[0]} error: {stderr_file.read().decode('utf-8', errors='replace')}")
+                raise RuntimeError(f"{cmd[0]} exited with status {process.returncode}")
+
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the engine's worker threads and await its result"""
+        return await run_blocking(func, *args)
+
+    async def _sleep(self, seconds):
+        """Wait between retries without blocking the event loop"""
+        await asyncio.sleep(seconds)
+
+    async def _acquire_lock(self, lock):
+        """Wait for a threading lock on a worker thread
+
+        If the waiting task is cancelled, the lock is released as soon as the thread gets it.
+        """
+        acquired = asyncio.ensure_future(run_blocking(lock.acquire))
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            acquired.add_done_callback(lambda _: lock.release())
+            raise
+
+    async def _send_request(self, file_path, request, limiter, audio_seconds, started_at=None):
+        """Make one upload attempt inside a slot of the concurrency window"""
+        api_url, headers, data, content_type = request
+        status_code = None
+        if started_at is None:
+            started_at = await limiter.acquire_async()
+        try:
+            with open(file_path, "rb") as audio_file:
+                files = {
+                    "file": (os.path.basename(file_path), audio_file, content_type)
+                }
+                response = await get_async_client(self.base_url).post(
+                    api_url,
+                    headers=headers,
+                    data=data,
+                    files=files
+                )
+            status_code = response.status_code
+            return response
+        finally:
+            limiter.release(started_at, status_code, audio_seconds)
+
+    async def _send_hedged(self, file_path, request, limiter, audio_seconds, hedge_budget):
+        """Make an upload attempt, duplicating it if it outlives recent calls
+
+        The hedge clock starts once the attempt has its slot, and the hedge
+        only takes a free one. The first 200 response wins and the slower
+        request is cancelled.
+        """
+        hedge_after = limiter.hedge_delay(audio_seconds) if hedge_budget else None
+        if hedge_after is None:
+            return await self._send_request(file_path, request, limiter, audio_seconds)
+
+        started_at = await limiter.acquire_async()
+        primary = asyncio.ensure_future(
+            self._send_request(file_path, request, limiter, audio_seconds, started_at)
+        )
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            hedge_started_at = None if done else self._claim_hedge(limiter, hedge_budget)
+            if hedge_started_at is None:
+                return await primary
+
+            log(f"Upload of {file_path} passed {hedge_after:.1f} seconds, sending a hedged request")
+            hedge = asyncio.ensure_future(
+                self._send_request(file_path, request, limiter, audio_seconds, hedge_started_at)
+            )
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code == 200:
+                        log(f"{'Hedged' if task is hedge else 'Original'} request for {file_path} won")
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _transcribe_chunks(self, chunks, model, language, translate, checkpoint_dir, expected=None):
+        """Transcribe chunk dicts concurrently under a semaphore, checkpointing each result
+
+        chunks may be an async generator still cutting audio, in which case
+        expected gives the number of chunks it will yield.
+        """
+        total = len(chunks) if expected is None else expected
+        if not total:
+            return []
+        max_workers = self._chunk_workers()
+        log(f"Transcribing {total} chunks with up to {max_workers} in flight")
+        semaphore = asyncio.Semaphore(max_workers)
+        hedge_budget = self._hedge_budget(total)
+
+        async def transcribe_chunk(chunk):
+            async with semaphore:
+                log(f"Submitting chunk {chunk['index']+1}: {chunk['path']} (offset {chunk['start']} seconds)")
+                return await self._transcribe_chunk(
+                    chunk, model, language, translate, checkpoint_dir, hedge_budget
+                )
+
+        tasks = {}
+        try:
+            if hasattr(chunks, "__aiter__"):
+                async for chunk in chunks:
+                    tasks[chunk["index"]] = asyncio.ensure_future(transcribe_chunk(chunk))
+            else:
+                for chunk in chunks:
+                    tasks[chunk["index"]] = asyncio.ensure_future(transcribe_chunk(chunk))
+        finally:
+            # Let chunks already submitted finish and checkpoint even if the split failed
+            succeeded = await asyncio.gather(*tasks.values())
+        return sorted(index for index, ok in zip(tasks, succeeded) if not ok)
@@ -3,17 +3,149 @@ import time
 import tempfile
 import subprocess
 import json
+import csv
+import re
 import traceback
+import difflib
+import hashlib
+import threading
+import shutil
+import uuid
+import socket
+import random
+import asyncio
 import requests
-import sys
+import urllib3
+import yt_dlp
+import bisect
+import ipaddress
+from collections import deque, OrderedDict
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from datetime import datetime
+from urllib.parse import urlparse, urljoin
+from email.utils import parsedate_to_datetime
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 # Constants
 DEFAULT_OUTPUT_DIR = "outputs"
 MAX_FILE_SIZE_MB = 25  # Maximum file size in MB for API processing
 CHUNK_SIZE_MINUTES = 10  # Size of chunks in minutes
+MAX_CONCURRENT_CHUNKS = 4  # Maximum number of chunk uploads in flight at once
+TRANSCRIPTION_CACHE = True  # Reuse transcripts of identical audio
+CACHE_MAX_SIZE_MB = 1024  # Size cap for the outputs directory, enforced by LRU eviction
+CHECKPOINT_DIR = "checkpoints"  # Per-job chunk checkpoints, inside the output directory
+CHECKPOINT_MAX_AGE_HOURS = 72  # Checkpoints kept for retry are deleted after this long unused
+CHECKPOINT_MAX_SIZE_MB = 2048  # Size cap for all checkpoints, enforced by deleting the least recently used
+SPEECH_MIN_BITRATE_KBPS = 12  # Lowest Opus bitrate still transcribed reliably
+SPEECH_MAX_BITRATE_KBPS = 32  # No accuracy gain above this for 16 kHz mono speech
+SILENCE_ALIGNED_CHUNKS = True  # Snap chunk boundaries to nearby silences
+SILENCE_NOISE_DB = -35  # Level below which audio counts as silence
+SILENCE_MIN_SECONDS = 0.4  # Shortest pause usable as a chunk boundary
+SILENCE_SEARCH_SECONDS = 30  # How far before a nominal cut to look for a pause
+CHUNK_OVERLAP_SECONDS = 3  # Overlap added where no pause was found near a cut
+VAD_MIN_SILENCE_SECONDS = 2  # Shortest pause cut out when removing silence
+VAD_PADDING_SECONDS = 0.3  # Audio kept on each side of a removed pause
+VAD_MIN_REMOVED_SECONDS = 10  # Skip silence removal if it would save less than this
+MAX_SPEEDUP = 2.0  # Fastest playback speed audio may be sped up to before upload
+STREAM_COPY_CHUNKS = True  # Split by stream copy when the API accepts the source codec
+DEMUX_VIDEO_UPLOADS = True  # Strip video tracks so only the audio stream is uploaded
+MIN_STREAM_COPY_CHUNK_SECONDS = 120  # Re-encode instead if copied chunks would be shorter than this
+TRANSCRIPTION_MODES = ("standard", "latency")  # "latency" splits even files under the limit
+LATENCY_MODE_CHUNKS = 8  # Parallel chunks a file is split into in latency mode
+LATENCY_MIN_CHUNK_SECONDS = 60  # Shortest chunk latency mode will cut
+
+# Source codecs the Whisper API accepts as-is, and the container to segment them into
+STREAM_COPY_FORMATS = {
+    "mp3": ".mp3",
+    "aac": ".m4a",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "flac": ".flac",
+}
+
+# Content types sent with uploads, by file extension
+AUDIO_CONTENT_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".mpeg": "audio/mpeg",
+    ".mpga": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".mp4": "audio/mp4",
+    ".ogg": "audio/ogg",
+    ".oga": "audio/ogg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+    ".webm": "audio/webm",
+}
+
+# Upload extensions by ffprobe container name, for downloaded media named without a usable one
+CONTAINER_EXTENSIONS = {
+    "mp3": ".mp3",
+    "mp4": ".mp4",
+    "ogg": ".ogg",
+    "webm": ".webm",
+    "wav": ".wav",
+    "flac": ".flac",
+}
 DEBUG = True  # Enable detailed logging
 
+# HTTP connection pooling for API calls, shared by all transcriber instances
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))  # Connections kept per base URL
+HTTP_KEEPALIVE_SECONDS = int(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))  # TCP keep-alive idle time
+
+# Retries and circuit breaking for API calls
+MAX_API_RETRIES = 5  # Retries after the first attempt for 429, 5xx and connection errors
+RETRY_BASE_DELAY_SECONDS = 1  # Backoff ceiling for the first retry, doubled on each further retry
+RETRY_MAX_DELAY_SECONDS = 60  # Longest single wait, including a server's Retry-After
+CIRCUIT_FAILURE_THRESHOLD = 10  # Consecutive failed attempts that open a base URL's circuit
+CIRCUIT_RESET_SECONDS = 30  # How long an open circuit holds calls back before a trial request
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Adaptive (AIMD) concurrency for API calls, tracked per base URL
+ADAPTIVE_CONCURRENCY = True  # Grow and shrink each base URL's window from call outcomes
+ADAPTIVE_MAX_CONCURRENCY = 16  # Ceiling the window may grow to from its start at max_concurrent_chunks
+ADAPTIVE_DECREASE_FACTOR = 0.5  # Multiplier applied to the window on congestion
+ADAPTIVE_LATENCY_FACTOR = 2  # Latency per audio minute over this multiple of the best seen counts as congestion
+CONGESTION_STATUS_CODES = {429, 503}
+
+# Hedged chunk uploads: duplicate a straggling request and keep the first response
+HEDGED_REQUESTS = False  # Off by default since hedges can double the cost of a chunk
+HEDGE_LATENCY_PERCENTILE = 95  # Hedge a chunk once it runs past this percentile of recent calls
+HEDGE_MIN_SAMPLES = 5  # Recent calls needed before hedging starts
+HEDGE_MAX_EXTRA_FRACTION = 0.1  # Most duplicate requests per job, as a fraction of its chunks
+
+# Media probing
+PROBE_CACHE_SIZE = 256  # ffprobe results kept in memory, keyed by path, size and mtime
+
+# Remote media URLs
+REMOTE_MEDIA_SCHEMES = ("http://", "https://")  # URL schemes remote media can be fetched from
+REMOTE_MEDIA_TIMEOUT_SECONDS = 30  # Connect and read timeout for remote media requests
+REMOTE_MEDIA_MAX_REDIRECTS = 5  # Redirects followed, each checked like the original URL
+REMOTE_MEDIA_PROTOCOLS = "http,tcp"  # Protocols ffmpeg may open; it only reads remote media from the local proxy
+REMOTE_MEDIA_DEMUXERS = "mov,matroska,mp3,ogg,wav,flac,aac,asf,avi,flv,mpegts,mpeg,aiff,caf,amr"  # Demuxers allowed for remote media
+REMOTE_MEDIA_PROXIED_HEADERS = ("Content-Type", "Content-Length", "Content-Range", "Accept-Ranges",
+                                "ETag", "Last-Modified")  # Origin headers passed on to ffmpeg
+
+# YouTube metadata lookups, cached in memory by video ID
+YOUTUBE_INFO_CACHE_SIZE = 512  # Videos whose title and thumbnail are kept
+YOUTUBE_INFO_TTL_SECONDS = 3600  # How long a cached title and thumbnail stay valid
+
+# Downloaded YouTube audio, kept on disk by video ID and audio format
+YOUTUBE_AUDIO_CACHE = True  # Reuse downloaded audio for repeat requests of a video
+YOUTUBE_CACHE_DIR = "youtube_cache"  # Cached YouTube audio, inside the output directory
+YOUTUBE_DOWNLOAD_DIR = "youtube_downloads"  # Per-job download directories next to the cache, so entries are hard linked
+YOUTUBE_DOWNLOAD_MAX_AGE_HOURS = 24  # Download directories left behind by a crashed job are removed after this long
+YOUTUBE_CACHE_MAX_SIZE_MB = 2048  # Size cap for cached YouTube audio, enforced by LRU eviction
+YOUTUBE_AUDIO_FORMATS = ("native", "speech", "mp3")  # Ways YouTube audio can be downloaded
+YOUTUBE_AUDIO_FORMAT = "native"  # Smallest audio-only stream as-is; "speech" re-encodes it to Opus
+
+# Smallest audio-only stream in a codec the API accepts, falling back to the smallest file
+YOUTUBE_NATIVE_FORMAT = "worstaudio[acodec=opus]/worstaudio[ext=m4a]/worstaudio/worst"
+YOUTUBE_CONCURRENT_FRAGMENTS = 4  # Fragments of a segmented stream downloaded at once
+YOUTUBE_PLAYLIST_MAX_VIDEOS = 1000  # Most videos a playlist or channel link expands to
+
 # Setup logging
 def log(message):
     """Print debug messages if DEBUG is enabled"""
@@ -24,111 +156,1531 @@ def log(message):
 # Ensure output directories exist
 os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
 
+def is_remote_source(file_path):
+    """Whether file_path is a remote media URL rather than a local file"""
+    return file_path.lower().startswith(REMOTE_MEDIA_SCHEMES)
+
+def source_name(file_path):
+    """File name of a local path, or the last path segment of a URL without its query string"""
+    if is_remote_source(file_path):
+        return os.path.basename(urlparse(file_path).path) or "remote_media"
+    return os.path.basename(file_path)
+
+def media_url_error(media_url, allowed_hosts=None):
+    """Reason the server may not fetch a media URL, or None if it may
+    
+    Only http(s) URLs are accepted. With a non-empty allowed_hosts the host
+    must be listed; an entry with a leading dot (".example.com") also allows
+    its subdomains. Hosts resolving to loopback, private, link-local or any
+    other non-public address are always refused, so a URL can't point the
+    server at itself or its internal network.
+    """
+    return check_media_url(media_url, allowed_hosts)[1]
+
+def check_media_url(media_url, allowed_hosts=None):
+    """Check a media URL like media_url_error, returning (address, error)
+    
+    address is the public IP the host resolved to. Fetching the URL from it
+    with open_pinned, rather than resolving the host again, keeps a DNS
+    answer that changes after the check from reaching an internal address.
+    """
+    if not is_remote_source(media_url):
+        return None, "media_url must be an http(s) URL"
+    host = (urlparse(media_url).hostname or "").lower()
+    if not host:
+        return None, "media_url has no host"
+    
+    if allowed_hosts:
+        allowed = [entry.lower() for entry in allowed_hosts]
+        if not any(host == entry or (entry.startswith(".") and (host == entry[1:] or host.endswith(entry)))
+                   for entry in allowed):
+            return None, f"Host {host} is not an allowed media host"
+    
+    try:
+        addresses = list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(host, None)))
+    except socket.gaierror as e:
+        return None, f"Could not resolve host {host}: {str(e)}"
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%")[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            return None, f"Host {host} resolves to non-public address {address}"
+    return addresses[0], None
+
+@contextmanager
+def open_pinned(media_url, address, method="GET", headers=None):
+    """Request media_url from an already checked IP address, without following redirects
+    
+    The connection goes to address, while the Host header, TLS server name
+    and certificate check use the URL's host. Yields the urllib3 response
+    with its body unread.
+    """
+    parsed = urlparse(media_url)
+    options = {"timeout": urllib3.Timeout(REMOTE_MEDIA_TIMEOUT_SECONDS), "retries": False, "maxsize": 1}
+    if parsed.scheme.lower() == "https":
+        pool = urllib3.HTTPSConnectionPool(
+            address, parsed.port or 443, server_hostname=parsed.hostname, assert_hostname=parsed.hostname,
+            cert_reqs="CERT_REQUIRED", ca_certs=DEFAULT_CA_BUNDLE_PATH, **options
+        )
+    else:
+        pool = urllib3.HTTPConnectionPool(address, parsed.port or 80, **options)
+    
+    path = (parsed.path or "/") + (f"?{parsed.query}" if parsed.query else "")
+    request_headers = {**(headers or {}), "Host": parsed.netloc.rpartition("@")[2]}
+    with pool:
+        response = pool.urlopen(method, path, headers=request_headers, redirect=False,
+                                retries=False, preload_content=False)
+        try:
+            yield response
+        finally:
+            response.release_conn()
+
+class MediaProxy:
+    """Loopback HTTP server serving one checked media URL to ffmpeg and ffprobe
+    
+    They are given this proxy's URL instead of the media URL. Every request,
+    with its Range header, is forwarded to the checked address through
+    open_pinned, and a redirect from the origin is answered with a 502 rather
+    than followed, so neither DNS rebinding nor a redirect can send them to
+    an internal host. Call close() once the job is done with the media.
+    """
+    
+    def __init__(self, media_url, address):
+        self.media_url = media_url
+        self.address = address
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), MediaProxyHandler)
+        self.server.daemon_threads = True
+        self.server.media_proxy = self
+        # A random path keeps other local processes from using the proxy
+        self.path = f"/{uuid.uuid4().hex}/{source_name(media_url)}"
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}{self.path}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        log(f"Serving {media_url} from {address} to ffmpeg at {self.url}")
+    
+    def close(self):
+        """Stop the server and close its socket"""
+        self.server.shutdown()
+        self.server.server_close()
+
+class MediaProxyHandler(BaseHTTPRequestHandler):
+    """Forward GET and HEAD requests for a MediaProxy's path to its pinned origin"""
+    
+    def do_GET(self):
+        self._forward("GET")
+    
+    def do_HEAD(self):
+        self._forward("HEAD")
+    
+    def _forward(self, method):
+        proxy = self.server.media_proxy
+        if self.path != proxy.path:
+            self.send_error(404)
+            return
+        
+        headers = {"Range": self.headers["Range"]} if self.headers["Range"] else {}
+        responded = False
+        try:
+            with open_pinned(proxy.media_url, proxy.address, method, headers) as response:
+                if 300 <= response.status < 400:
+                    log(f"Refusing redirect from {proxy.media_url} to {response.headers.get('Location')}")
+                    self.send_error(502, "Media URL redirected")
+                    return
+                
+                self.send_response(response.status)
+                responded = True
+                for name in REMOTE_MEDIA_PROXIED_HEADERS:
+                    if name in response.headers:
+                        self.send_header(name, response.headers[name])
+                self.end_headers()
+                if method == "GET":
+                    for block in response.stream(64 * 1024, decode_content=False):
+                        self.wfile.write(block)
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            # ffmpeg drops connections when it seeks, which is not worth logging
+            if not responded:
+                log(f"Error fetching {proxy.media_url} for ffmpeg: {str(e)}")
+                self.send_error(502, "Failed to fetch media URL")
+    
+    def log_message(self, format, *args):
+        log(f"Media proxy: {format % args}")
+
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file, read in 1 MB blocks"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def run_sync(awaitable):
+    """Run one of the sync engine's coroutines to completion in the calling thread
+    
+    Its I/O primitives block instead of suspending, so the coroutine finishes
+    on its first step without an event loop.
+    """
+    coroutine = awaitable.__await__()
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("A sync engine coroutine tried to suspend")
+
+def iterate_sync(iterable):
+    """Iterate one of the sync engine's async generators, or a plain iterable, from blocking code"""
+    if not hasattr(iterable, "__aiter__"):
+        yield from iterable
+        return
+    iterator = iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield run_sync(iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_sync(iterator.aclose())
+
+class YtDlpLogger:
+    """Route in-process yt-dlp messages through log()"""
+    
+    def debug(self, message):
+        log(f"yt-dlp: {message}")
+    
+    def info(self, message):
+        log(f"yt-dlp: {message}")
+    
+    def warning(self, message):
+        log(f"yt-dlp warning: {message}")
+    
+    def error(self, message):
+        log(f"yt-dlp error: {message}")
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections send TCP keep-alive probes
+    
+    Keeps idle pooled connections from being silently dropped by NAT and
+    load balancers between chunk uploads.
+    """
+    
+    def init_poolmanager(self, *args, **kwargs):
+        socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                          (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, HTTP_KEEPALIVE_SECONDS))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, HTTP_KEEPALIVE_SECONDS // 4)))
+        kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def get_session(base_url):
+    """Return the process-wide pooled requests.Session for an API base URL"""
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            adapter = KeepAliveHTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=HTTP_POOL_SIZE,
+                pool_block=False
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Connection"] = "keep-alive"
+            _sessions[base_url] = session
+            log(f"Created HTTP session for {base_url} with pool size {HTTP_POOL_SIZE}")
+        return session
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt+1
+    
+    Honors a Retry-After header (seconds or HTTP date) when the server sent
+    one, otherwise uses exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0), RETRY_MAX_DELAY_SECONDS)
+    
+    ceiling = min(RETRY_BASE_DELAY_SECONDS * (2 ** attempt), RETRY_MAX_DELAY_SECONDS)
+    return random.uniform(0, ceiling)
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one API base URL
+    
+    After CIRCUIT_FAILURE_THRESHOLD failed attempts in a row the circuit opens
+    and calls are held back for CIRCUIT_RESET_SECONDS. Then a single trial
+    call is let through: success closes the circuit, failure opens it again.
+    """
+    
+    def __init__(self, base_url, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.base_url = base_url
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+    
+    def before_call(self):
+        """Return 0 if a call may go ahead, else the seconds until the circuit half-opens"""
+        with self.lock:
+            if self.opened_at is None:
+                return 0
+            remaining = self.opened_at + self.reset_seconds - time.time()
+            if remaining <= 0 and not self.trial_in_flight:
+                self.trial_in_flight = True
+                log(f"Circuit for {self.base_url} half-open, sending a trial request")
+                return 0
+            return max(remaining, 1)
+    
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                log(f"Circuit for {self.base_url} closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+    
+    def release_trial(self):
+        """End a trial call that failed for reasons unrelated to the API, so another can be sent"""
+        with self.lock:
+            self.trial_in_flight = False
+    
+    def trial_pending(self):
+        """Whether a trial call is out deciding if the open circuit closes"""
+        with self.lock:
+            return self.trial_in_flight
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+                log(f"Circuit for {self.base_url} opened after {self.failures} consecutive failures")
+                self.opened_at = time.time()
+            self.trial_in_flight = False
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(base_url):
+    """Return the process-wide CircuitBreaker for an API base URL"""
+    with _breakers_lock:
+        return _breakers.setdefault(base_url, CircuitBreaker(base_url))
+
+class ConcurrencyLimiter:
+    """AIMD window on in-flight API calls to one base URL
+    
+    The window starts at start_window and never grows past max_window, or
+    stays at start_window with adaptive off. Each successful call grows it
+    by 1/window, so it rises by about one per round trip. A
+    429/503, or latency per minute of uploaded audio rising above
+    ADAPTIVE_LATENCY_FACTOR times the best seen, multiplies it by
+    ADAPTIVE_DECREASE_FACTOR, at most once per round trip. Latency is
+    measured per audio minute because the API's processing time follows
+    duration, not bytes, and low-bitrate Opus carries far more audio per MB.
+    """
+    
+    def __init__(self, base_url, start_window, max_window, adaptive=ADAPTIVE_CONCURRENCY):
+        self.base_url = base_url
+        self.adaptive = adaptive
+        self.start_window = start_window
+        self.max_window = max(start_window, max_window)
+        self.window = float(start_window)
+        self.in_flight = 0
+        self.best_latency = None  # Seconds per audio minute
+        self.recent_latencies = deque(maxlen=100)  # Seconds per audio minute of recent successful calls
+        self.last_decrease = 0
+        self.condition = threading.Condition()
+        self.async_waiters = []  # (loop, future) of coroutines waiting for a slot
+    
+    @property
+    def limit(self):
+        return max(1, int(self.window))
+    
+    def try_acquire(self):
+        """Take a slot without waiting, returning the call's start time or None if the window is full"""
+        with self.condition:
+            if self.in_flight >= self.limit:
+                return None
+            self.in_flight += 1
+            return time.time()
+    
+    def acquire(self):
+        """Wait for a slot in the window and return the call's start time"""
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+            return time.time()
+    
+    async def acquire_async(self):
+        """Wait on the running event loop for a slot in the window and return the call's start time
+        
+        The coroutine sleeps on a future that _notify resolves, so waiting
+        neither blocks the loop nor polls.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return time.time()
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            await waiter
+    
+    def _notify(self):
+        """Wake every thread and coroutine waiting for a slot; call with the condition held"""
+        self.condition.notify_all()
+        for loop, waiter in self.async_waiters:
+            try:
+                loop.call_soon_threadsafe(_wake_waiter, waiter)
+            except RuntimeError:
+                pass  # The waiter's loop has closed
+        self.async_waiters.clear()
+    
+    def configure(self, start_window, max_window):
+        """Apply a changed start or ceiling
+        
+        A new start resets the window to it; a lower ceiling shrinks the
+        window if it is now above it.
+        """
+        max_window = max(start_window, max_window)
+        with self.condition:
+            if start_window == self.start_window and max_window == self.max_window:
+                return
+            if start_window != self.start_window or not self.adaptive:
+                self.window = float(start_window)
+            else:
+                self.window = min(self.window, float(max_window))
+            self.start_window = start_window
+            self.max_window = max_window
+            log(f"Concurrency for {self.base_url} set to start at {start_window}, up to {max_window}")
+            self._notify()
+    
+    def release(self, started_at, status_code, audio_seconds):
+        """Free the slot of a call and adjust the window from its outcome
+        
+        status_code is None when the call raised; that leaves the window as is.
+        audio_seconds is None when the upload's duration is unknown, which
+        leaves its latency out.
+        """
+        now = time.time()
+        with self.condition:
+            self.in_flight -= 1
+            latency = None
+            if status_code == 200 and audio_seconds:
+                latency = (now - started_at) / max(audio_seconds / 60, 0.1)
+                self.recent_latencies.append(latency)
+            if self.adaptive and status_code is not None:
+                congested = status_code in CONGESTION_STATUS_CODES
+                if latency is not None:
+                    if self.best_latency is None or latency < self.best_latency:
+                        self.best_latency = latency
+                    else:
+                        # Let the best latency drift up so one fast outlier can't pin it
+                        self.best_latency *= 1.01
+                    congested = latency > self.best_latency * ADAPTIVE_LATENCY_FACTOR
+                
+                if congested:
+                    # Only one decrease per round trip: ignore calls that started before the last one
+                    if started_at > self.last_decrease:
+                        self.window = max(1.0, self.window * ADAPTIVE_DECREASE_FACTOR)
+                        self.last_decrease = now
+                        log(f"Concurrency for {self.base_url} decreased to {self.limit} (status {status_code})")
+                elif status_code == 200:
+                    previous_limit = self.limit
+                    self.window = min(float(self.max_window), self.window + 1 / self.window)
+                    if self.limit > previous_limit:
+                        log(f"Concurrency for {self.base_url} increased to {self.limit}")
+            self._notify()
+    
+    def hedge_delay(self, audio_seconds):
+        """Seconds after which a call uploading audio_seconds of audio is a straggler
+        
+        Returns None without enough history or if the duration is unknown.
+        """
+        with self.condition:
+            if not audio_seconds or len(self.recent_latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.recent_latencies)
+        index = min(len(ordered) - 1, len(ordered) * HEDGE_LATENCY_PERCENTILE // 100)
+        return ordered[index] * max(audio_seconds / 60, 0.1)
+
+def _wake_waiter(waiter):
+    """Resolve a slot waiter's future on its own loop, unless it was cancelled"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_concurrency_limiter(base_url, start_window=MAX_CONCURRENT_CHUNKS, max_window=ADAPTIVE_MAX_CONCURRENCY):
+    """Return the process-wide ConcurrencyLimiter for an API base URL
+    
+    The start and ceiling follow the latest caller, so changed settings
+    apply from the next upload on.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(base_url)
+        if limiter is None:
+            limiter = ConcurrencyLimiter(base_url, start_window, max_window)
+            _limiters[base_url] = limiter
+    limiter.configure(start_window, max_window)
+    return limiter
+
+class HedgeBudget:
+    """Number of duplicate requests one job may still send"""
+    
+    def __init__(self, max_hedges):
+        self.remaining = max_hedges
+        self.used = 0
+        self.lock = threading.Lock()
+    
+    def take(self):
+        """Claim one hedge, returning False once the budget is spent"""
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.used += 1
+            return True
+
+def transcription_key(audio_hash, model, language=None, translate=False, options=None):
+    """Build the key identifying a transcript of this audio with these settings
+    
+    options holds preprocessing settings that change the transcript; it is
+    left out of the key when empty so keys without preprocessing stay stable.
+    """
+    if language == "Automatic Detection":
+        language = None
+    key_parts = [audio_hash, model, language, bool(translate)]
+    if options:
+        key_parts.append(options)
+    key_data = json.dumps(key_parts, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+_probes = OrderedDict()
+_probes_lock = threading.Lock()
+
+def _probe_key(file_path):
+    """Identify a file's current contents by its real path, size and modification time
+    
+    Returns None for remote URLs, whose contents can't be checked cheaply.
+    """
+    if is_remote_source(file_path):
+        return None
+    stat = os.stat(file_path)
+    return (os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns)
+
+def get_cached_probe(file_path):
+    """Return the cached probe of a file if it has not changed since, else None"""
+    key = _probe_key(file_path)
+    if key is None:
+        return None
+    with _probes_lock:
+        media = _probes.get(key)
+        if media is not None:
+            _probes.move_to_end(key)
+        return media
+
+def cache_probe(file_path, media):
+    """Remember a file's probe, evicting the least recently used beyond PROBE_CACHE_SIZE"""
+    key = _probe_key(file_path)
+    if key is None:
+        return
+    with _probes_lock:
+        _probes[key] = media
+        _probes.move_to_end(key)
+        while len(_probes) > PROBE_CACHE_SIZE:
+            _probes.popitem(last=False)
+
+_youtube_info = OrderedDict()
+_youtube_info_lock = threading.Lock()
+
+def get_cached_youtube_info(key):
+    """Return the cached metadata for a video if it has not expired, else None"""
+    with _youtube_info_lock:
+        entry = _youtube_info.get(key)
+        if entry is None:
+            return None
+        expires_at, info = entry
+        if time.monotonic() >= expires_at:
+            del _youtube_info[key]
+            return None
+        _youtube_info.move_to_end(key)
+        return info
+
+def cache_youtube_info(key, info):
+    """Remember a video's metadata for YOUTUBE_INFO_TTL_SECONDS, evicting the least recently used"""
+    with _youtube_info_lock:
+        _youtube_info[key] = (time.monotonic() + YOUTUBE_INFO_TTL_SECONDS, info)
+        _youtube_info.move_to_end(key)
+        while len(_youtube_info) > YOUTUBE_INFO_CACHE_SIZE:
+            _youtube_info.popitem(last=False)
+
+def _probe_number(value, kind):
+    """Convert an ffprobe field to int or float, or None if it is missing or N/A"""
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError):
+        return None
+
+_checkpoint_locks = {}
+_checkpoint_locks_guard = threading.Lock()
+
+def _checkpoint_lock(checkpoint_id):
+    """Return the lock serializing work on one checkpoint directory"""
+    with _checkpoint_locks_guard:
+        return _checkpoint_locks.setdefault(checkpoint_id, threading.Lock())
+
+class TranscriptionCache:
+    """Content-addressed store of finished transcripts
+    
+    Entries live in <output_dir>/cache, keyed by the audio hash plus the
+    settings that change the transcript. Every file directly in the outputs
+    directory and in the cache counts towards max_size_mb; when it is exceeded
+    the least recently used files are deleted. Hits refresh an entry's mtime.
+    """
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, max_size_mb=CACHE_MAX_SIZE_MB):
+        self.output_dir = output_dir
+        self.cache_dir = os.path.join(output_dir, "cache")
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def get(self, key):
+        """Return the cached transcript content for key, or None on a miss"""
+        entry_path = os.path.join(self.cache_dir, f"{key}.json")
+        with self._lock:
+            try:
+                with open(entry_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+                os.utime(entry_path)
+                return content
+            except FileNotFoundError:
+                return None
+    
+    def put(self, key, content):
+        """Store transcript content under key and evict down to the size cap"""
+        entry_path = os.path.join(self.cache_dir, f"{key}.json")
+        with self._lock:
+            temp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, entry_path)
+            self._evict()
+    
+    def _evict(self):
+        """Delete least recently used files until the outputs directory fits the cap"""
+        files = []
+        for directory in (self.output_dir, self.cache_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                log(f"Evicted from outputs cache: {path}")
+            except OSError as e:
+                log(f"Warning: Failed to evict {path}: {e}")
+
+def _link_or_copy(source_path, dest_path):
+    """Hard link source_path to dest_path, copying instead across filesystems"""
+    try:
+        os.link(source_path, dest_path)
+    except OSError:
+        shutil.copyfile(source_path, dest_path)
+
+class YouTubeAudioCache:
+    """Downloaded YouTube audio, keyed by video ID and audio format
+    
+    Entries live in <output_dir>/youtube_cache, each with a <key>.json
+    holding the video's title and thumbnail URL so a hit needs no network
+    call. When they exceed max_size_mb the least recently used are deleted;
+    hits refresh an entry's mtime. Jobs download into directories under
+    <output_dir>/youtube_downloads, on the same filesystem, so entries are
+    stored and handed out as hard links rather than copies, and evicting one
+    never removes the audio from under a job that is still transcribing it.
+    """
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, output_dir=DEFAULT_OUTPUT_DIR, max_size_mb=YOUTUBE_CACHE_MAX_SIZE_MB):
+        self.cache_dir = os.path.join(output_dir, YOUTUBE_CACHE_DIR)
+        self.download_dir = os.path.join(output_dir, YOUTUBE_DOWNLOAD_DIR)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(self.download_dir, exist_ok=True)
+    
+    def get(self, key, dest_base):
+        """Link the cached audio for key to dest_base plus its extension
+        
+        Returns (linked path, metadata), where metadata is None for entries
+        stored without it, or None on a miss.
+        """
+        with self._lock:
+            entry_path = self._find(key)
+            if entry_path is None:
+                return None
+            os.utime(entry_path)
+            dest_path = dest_base + os.path.splitext(entry_path)[1]
+            _link_or_copy(entry_path, dest_path)
+            try:
+                with open(self._metadata_path(key), "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                metadata = None
+            return dest_path, metadata
+    
+    def put(self, key, file_path, metadata):
+        """Store downloaded audio and its metadata dict under key and evict down to the size cap"""
+        entry_path = os.path.join(self.cache_dir, key + os.path.splitext(file_path)[1])
+        with self._lock:
+            old_path = self._find(key)
+            if old_path and old_path != entry_path:
+                os.remove(old_path)
+            temp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+            _link_or_copy(file_path, temp_path)
+            os.replace(temp_path, entry_path)
+            # yt-dlp dates files by the server's Last-Modified, so mark the entry as just used
+            os.utime(entry_path)
+            metadata_path = self._metadata_path(key)
+            with open(f"{metadata_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            os.replace(f"{metadata_path}.tmp", metadata_path)
+            self._evict()
+            self._prune_downloads()
+    
+    def _metadata_path(self, key):
+        """Path of the title and thumbnail stored with an entry"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _find(self, key):
+        """Path of the cached audio for key, whatever its extension, or None"""
+        for entry in os.scandir(self.cache_dir):
+            name, extension = os.path.splitext(entry.name)
+            if name == key and extension not in (".tmp", ".json"):
+                return entry.path
+        return None
+    
+    def _evict(self):
+        """Delete least recently used entries, with their metadata, until the cache fits the cap"""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            name, extension = os.path.splitext(entry.name)
+            if entry.is_file() and extension not in (".tmp", ".json"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path, name))
+        
+        total_size = sum(size for _, size, _, _ in files)
+        for _, size, path, key in sorted(files):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                log(f"Evicted from YouTube audio cache: {path}")
+            except OSError as e:
+                log(f"Warning: Failed to evict {path}: {e}")
+                continue
+            try:
+                os.remove(self._metadata_path(key))
+            except OSError:
+                pass
+    
+    def _prune_downloads(self):
+        """Remove download directories older than YOUTUBE_DOWNLOAD_MAX_AGE_HOURS, left by jobs that died"""
+        expires_before = time.time() - YOUTUBE_DOWNLOAD_MAX_AGE_HOURS * 3600
+        for entry in os.scandir(self.download_dir):
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < expires_before:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    log(f"Removed stale YouTube download directory {entry.path}")
+            except OSError:
+                continue
+
 class WhisperAPITranscriber:
-    def __init__(self, api_key, base_url, output_dir=DEFAULT_OUTPUT_DIR):
+    """Transcribes local files, media URLs and YouTube videos with a Whisper API
+    
+    The control flow is written once, as coroutines shared with
+    AsyncWhisperAPITranscriber. This engine's I/O primitives (_run_command,
+    _command_rows, _run_blocking, _sleep, _acquire_lock, _send_hedged and
+    _transcribe_chunks) block rather than suspend, so the public methods run
+    those coroutines to completion in the calling thread with run_sync.
+    """
+    
+    # Errors of the HTTP client: transport failures worth retrying, and any client error
+    _retryable_errors = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+    _client_errors = (requests.RequestException,)
+    
+    def __init__(self, api_key, base_url, output_dir=DEFAULT_OUTPUT_DIR,
+                 max_concurrent_chunks=MAX_CONCURRENT_CHUNKS, hedged_requests=HEDGED_REQUESTS,
+                 media_url_allowed_hosts=None, adaptive_max_concurrency=ADAPTIVE_MAX_CONCURRENCY):
         self.api_key = api_key
         self.base_url = base_url
         self.output_dir = output_dir
+        self.max_concurrent_chunks = max(1, int(max_concurrent_chunks))
+        self.adaptive_max_concurrency = max(self.max_concurrent_chunks, int(adaptive_max_concurrency))
+        self.hedged_requests = hedged_requests
+        self.media_url_allowed_hosts = media_url_allowed_hosts or []
+        self.remote_probes = {}  # Probes of remote media, kept while a transcribe_url call runs
+        self.cache = TranscriptionCache(output_dir) if TRANSCRIPTION_CACHE else None
+        self.youtube_cache = YouTubeAudioCache(output_dir) if YOUTUBE_AUDIO_CACHE else None
         
     def transcribe_file(self, file_path, model, language=None,
-                        translate=False, timestamp=True):
-        """Transcribe an audio file using Whisper API"""
+                        translate=False, timestamp=True, audio_hash=None, mode="standard",
+                        remove_silence=False, speedup=1.0):
+        """Transcribe an audio file using Whisper API
+        
+        Identical audio transcribed with the same model, language and translate
+        setting is served from the transcript cache. Pass audio_hash if the
+        file's SHA-256 is already known to avoid reading it again. With
+        remove_silence, long pauses are cut out before upload, and speedup
+        plays the audio faster; either way timestamps are mapped back to the
+        original audio.
+        """
+        return run_sync(self._transcribe_cached(
+            file_path, model, language, translate, timestamp, audio_hash, mode, remove_silence, speedup
+        ))
+    
+    async def _transcribe_cached(self, file_path, model, language, translate, timestamp, audio_hash,
+                                 mode, remove_silence, speedup):
+        """Serve transcribe_file from the transcript cache, or preprocess and transcribe the file"""
         try:
             start_time = time.time()
             
-            # Check file size
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            if file_size_mb > MAX_FILE_SIZE_MB:
-                log(f"File size ({file_size_mb:.2f} MB) exceeds limit of {MAX_FILE_SIZE_MB} MB. Using chunking.")
-                return self._transcribe_large_file(file_path, model, language, translate, timestamp)
+            # The same key names the checkpoint directory of chunked jobs
+            if audio_hash is None:
+                audio_hash = await self._run_blocking(hash_file, file_path)
+            options = self._preprocessing_options(remove_silence, speedup)
+            cache_key = transcription_key(audio_hash, model, language, translate, options)
             
-            log(f"Sending file to API: {file_path}")
-            log(f"File size: {file_size_mb:.2f} MB")
-            log(f"Model: {model}, Format: verbose_json, Language: {language}")
+            cached_result = self._cached_result(cache_key, file_path, timestamp, start_time)
+            if cached_result:
+                return cached_result
             
-            # Prepare the API URL
-            api_url = f"{self.base_url}/audio/transcriptions"
+            result = await self._transcribe_prepared(
+                file_path, model, language, translate, timestamp, cache_key, mode,
+                remove_silence, speedup
+            )
+            self._cache_result(cache_key, result)
+            return result
             
-            # Prepare files and data for the request
-            files = {
-                "file": (os.path.basename(file_path), open(file_path, "rb"), "audio/mpeg")
-            }
+        except Exception as e:
+            log(f"Error in transcribe_file: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": str(e)}
+    
+    def transcribe_url(self, media_url, model, language=None, translate=False, timestamp=True,
+                       mode="standard", remove_silence=False, speedup=1.0):
+        """Transcribe remote media from an HTTP(S) URL
+        
+        Media under the size limit is downloaded, hashed on the way, and
+        transcribed like an upload. Larger media is never stored whole: ffmpeg
+        reads it through a MediaProxy, seeking with Range requests, and only
+        the audio it demuxes, transcodes or cuts into chunks is written locally.
+        The URL and every redirect must pass media_url_error, and each is then
+        fetched from the address that was checked.
+        """
+        return run_sync(self._transcribe_url(
+            media_url, model, language, translate, timestamp, mode, remove_silence, speedup
+        ))
+    
+    async def _transcribe_url(self, media_url, model, language, translate, timestamp, mode,
+                              remove_silence, speedup):
+        """Check, size up and then download or stream remote media for transcribe_url"""
+        try:
+            # Resolving the host blocks, so the async engine checks the URL in a worker thread
+            address, error = await self._run_blocking(check_media_url, media_url, self.media_url_allowed_hosts)
+            if error:
+                return {"error": error}
             
-            # Prepare data payload
-            data = {
-                "model": model,
-                "response_format": "verbose_json"
-            }
+            remote = await self._run_blocking(self._remote_media_info, media_url, address)
+            if "error" in remote:
+                return remote
+            media_url = remote["url"]
             
-            # Add optional parameters
-            if language and language != "Automatic Detection":
-                data["language"] = language
-                
-            if translate:
-                data["prompt"] = "Please transcribe this audio and translate to English if needed."
+            if remote["size"] is not None and remote["size"] <= MAX_FILE_SIZE_MB * 1024 * 1024:
+                temp_dir = tempfile.mkdtemp()
+                try:
+                    temp_path, audio_hash = await self._run_blocking(
+                        self._download_media, media_url, remote["address"], temp_dir
+                    )
+                    temp_path = self._with_media_extension(temp_path, await self._probe(temp_path))
+                    return await self._transcribe_cached(
+                        temp_path, model, language, translate, timestamp, audio_hash=audio_hash,
+                        mode=mode, remove_silence=remove_silence, speedup=speedup
+                    )
+                finally:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
             
-            # Set up headers
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            }
+            log(f"Streaming {media_url} into ffmpeg without downloading it")
+            proxy = MediaProxy(media_url, remote["address"])
+            try:
+                return await self._transcribe_cached(
+                    proxy.url, model, language, translate, timestamp,
+                    audio_hash=self._remote_media_key(media_url, remote),
+                    mode=mode, remove_silence=remove_silence, speedup=speedup
+                )
+            finally:
+                # The URL is probed once per job; a later job may find different contents
+                self.remote_probes.pop(proxy.url, None)
+                await self._run_blocking(proxy.close)
             
-            # Make the API request
-            log(f"Making API request to {api_url}")
-            log(f"Request data: {data}")
+        except Exception as e:
+            log(f"Error in transcribe_url: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": f"Failed to process media URL: {str(e)}"}
+    
+    def _remote_media_info(self, media_url, address):
+        """Final URL and address, size, validators and Range support of remote media, from a one-byte ranged GET
+        
+        Redirects are followed one at a time so each target is checked with
+        check_media_url and requested from the address it resolved to; ffmpeg
+        and the download are then pointed at the final URL and address.
+        """
+        try:
+            for _ in range(REMOTE_MEDIA_MAX_REDIRECTS + 1):
+                with open_pinned(media_url, address, headers={"Range": "bytes=0-0"}) as response:
+                    if response.get_redirect_location():
+                        media_url = urljoin(media_url, response.headers["Location"])
+                        address, error = check_media_url(media_url, self.media_url_allowed_hosts)
+                        if error:
+                            return {"error": f"Media URL redirected to a refused location: {error}"}
+                        continue
+                    
+                    if response.status >= 400:
+                        return {"error": f"Failed to fetch media URL: HTTP {response.status}"}
+                    
+                    accepts_ranges = response.status == 206
+                    if accepts_ranges:
+                        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    else:
+                        total = response.headers.get("Content-Length", "")
+                        log(f"Warning: {media_url} does not support Range requests, seeking will re-read it")
+                    
+                    return {
+                        "url": media_url,
+                        "address": address,
+                        "size": int(total) if total.isdigit() else None,
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "accepts_ranges": accepts_ranges
+                    }
+            return {"error": f"Media URL redirected more than {REMOTE_MEDIA_MAX_REDIRECTS} times"}
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            return {"error": f"Failed to fetch media URL: {str(e)}"}
+    
+    def _download_media(self, media_url, address, temp_dir):
+        """Download remote media from its checked address to temp_dir, hashing it on the way
+        
+        Returns (path, SHA-256 hex digest). Raises if the media turns out to
+        be larger than MAX_FILE_SIZE_MB, whatever size the server reported.
+        """
+        temp_path = os.path.join(temp_dir, source_name(media_url))
+        hasher = hashlib.sha256()
+        limit = MAX_FILE_SIZE_MB * 1024 * 1024
+        received = 0
+        with open_pinned(media_url, address) as response:
+            # Redirects were resolved and checked up front, so anything but 200 is an error
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status} downloading {media_url}")
+            with open(temp_path, "wb") as f:
+                for block in response.stream(1024 * 1024):
+                    received += len(block)
+                    if received > limit:
+                        raise RuntimeError(f"{media_url} is larger than the {MAX_FILE_SIZE_MB} MB it was expected to fit in")
+                    hasher.update(block)
+                    f.write(block)
+        return temp_path, hasher.hexdigest()
+    
+    def _with_media_extension(self, file_path, media):
+        """Give downloaded media an extension the API accepts, from its probed container or codec
+        
+        Media URLs often end without one, or with one like .php, and the API
+        identifies uploads by name. Returns the path, renamed if needed.
+        """
+        base_name, extension = os.path.splitext(file_path)
+        if extension.lower() in AUDIO_CONTENT_TYPES or not media:
+            return file_path
+        
+        container = media.get("format") or ""
+        new_extension = next(
+            (CONTAINER_EXTENSIONS[name] for name in container.split(",") if name in CONTAINER_EXTENSIONS),
+            STREAM_COPY_FORMATS.get(media["codec"])
+        )
+        if not new_extension:
+            return file_path
+        
+        new_path = base_name + new_extension
+        os.replace(file_path, new_path)
+        cache_probe(new_path, media)
+        log(f"Named downloaded media {os.path.basename(new_path)} after its {container or media['codec']} contents")
+        return new_path
+    
+    def _remote_media_key(self, media_url, remote):
+        """Stand-in audio hash for remote media that is streamed rather than downloaded
+        
+        Built from the URL and the server's validators, so a changed file gets
+        a new key. Without an ETag or Last-Modified a change can't be detected,
+        so every request gets a unique key and the transcript cache is bypassed.
+        """
+        if not remote["etag"] and not remote["last_modified"]:
+            return uuid.uuid4().hex
+        key_data = json.dumps([media_url, remote["etag"], remote["last_modified"], remote["size"]])
+        return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+    
+    def _preprocessing_options(self, remove_silence, speedup):
+        """Preprocessing settings that change the transcript, for the cache key"""
+        options = {}
+        if remove_silence:
+            options["remove_silence"] = True
+        if speedup != 1:
+            options["speedup"] = speedup
+        return options or None
+    
+    async def _transcribe_prepared(self, file_path, model, language, translate, timestamp,
+                                   checkpoint_id, mode, remove_silence, speedup):
+        """Check and preprocess the audio, then transcribe it
+        
+        Files ffprobe cannot read, or that have no audio, are rejected before
+        any API call. Video tracks are dropped, and silence removal and
+        speedup are applied if asked for.
+        """
+        media = await self._probe(file_path)
+        error = self._preflight_error(media)
+        if error:
+            log(f"Rejecting {file_path}: {error}")
+            return {"error": error}
+        
+        temp_dir = tempfile.mkdtemp()
+        try:
+            # Silence removal reads the audio twice, so remote audio is copied out once first
+            local_copy = remove_silence and is_remote_source(file_path)
+            if (DEMUX_VIDEO_UPLOADS and media["has_video"]) or local_copy:
+                audio_path = await self._extract_audio(file_path, tempfile.mkdtemp(dir=temp_dir), media)
+                if audio_path:
+                    file_path = audio_path
             
-            response = requests.post(
-                api_url,
-                headers=headers,
-                data=data,
-                files=files,
-                timeout=300  # 5-minute timeout
+            timeline = None
+            if remove_silence or speedup != 1:
+                prepared = await self._prepare_audio(file_path, temp_dir, remove_silence, speedup)
+                if prepared is not None:
+                    file_path, timeline = prepared
+            
+            return await self._transcribe_file(
+                file_path, model, language, translate, timestamp,
+                checkpoint_id=checkpoint_id, mode=mode, timeline=timeline
             )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _preflight_error(self, media):
+        """Reason a probed file cannot be transcribed, or None if it looks usable"""
+        if media is None:
+            return "Could not read the file as audio or video; it may be corrupt or unsupported"
+        if not media["codec"]:
+            return "File has no audio stream"
+        if media["duration"] is not None and media["duration"] <= 0:
+            return "Audio is empty"
+        return None
+    
+    async def _prepare_audio(self, file_path, temp_dir, remove_silence, speedup=1.0):
+        """Cut long silences out of the audio and/or speed it up before upload
+        
+        Returns (prepared_path, timeline), where the timeline maps times in the
+        prepared audio back to the original, or None to use the file as is.
+        """
+        try:
+            duration = await self._get_audio_duration(file_path)
+            if not duration:
+                log("Could not determine audio duration, skipping preprocessing")
+                return None
             
-            # Log the full response for debugging
-            log(f"Response status code: {response.status_code}")
-            log(f"Response headers: {response.headers}")
+            timeline = None
+            if remove_silence:
+                silences = await self._detect_silences(file_path, VAD_MIN_SILENCE_SECONDS)
+                timeline = self._speech_timeline(duration, silences)
+            timeline = self._apply_speedup(timeline, duration, speedup)
+            if timeline is None:
+                return None
             
-            # Check for successful response
-            if response.status_code != 200:
-                error_msg = f"API request failed with status code {response.status_code}: {response.text}"
-                log(error_msg)
-                return {"error": error_msg}
+            cmd, output_path = self._prepare_command(file_path, temp_dir, timeline)
+            result = await self._run_command(cmd)
             
-            # Log response content
-            log(f"Response content type: {response.headers.get('Content-Type', 'unknown')}")
-            log(f"Raw response (first 500 chars): {response.text[:500]}")
+            if result.returncode != 0:
+                log(f"ffmpeg error: {result.stderr}")
+                return None
             
-            # Generate output file path
-            file_name = os.path.basename(file_path)
-            base_name, _ = os.path.splitext(file_name)
+            return output_path, timeline
             
-            if timestamp:
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_name = f"{base_name}_{timestamp_str}.json"
-            else:
-                output_name = f"{base_name}.json"
+        except Exception as e:
+            log(f"Error preparing audio: {str(e)}")
+            return None
+    
+    def _speech_timeline(self, duration, silences):
+        """Plan the audio kept when cutting out silences, or None if too little would be removed
+        
+        The timeline's regions are [prepared_start, original_start, length]
+        triples, in order, covering the prepared audio.
+        """
+        kept = []
+        position = 0.0
+        for start, end in silences:
+            cut_start = start + VAD_PADDING_SECONDS if start > 0 else 0.0
+            cut_end = end - VAD_PADDING_SECONDS if end < duration else duration
+            if cut_end <= cut_start:
+                continue
+            if cut_start > position:
+                kept.append((position, cut_start))
+            position = max(position, cut_end)
+        if position < duration:
+            kept.append((position, duration))
+        
+        removed = duration - sum(end - start for start, end in kept)
+        if not kept or removed < VAD_MIN_REMOVED_SECONDS:
+            log(f"Only {removed:.1f} seconds of silence found, sending audio as is")
+            return None
+        
+        regions = []
+        prepared_start = 0.0
+        for start, end in kept:
+            regions.append([round(prepared_start, 3), round(start, 3), round(end - start, 3)])
+            prepared_start += end - start
+        log(f"Removing {removed:.1f} of {duration:.1f} seconds of silence in {len(kept)} speech regions")
+        return {"duration": duration, "regions": regions}
+    
+    def _apply_speedup(self, timeline, duration, speedup):
+        """Add a playback speed to a timeline, creating one without cuts if needed"""
+        if speedup == 1:
+            return timeline
+        log(f"Speeding audio up {speedup}x before upload")
+        timeline = timeline or {"duration": duration, "regions": []}
+        timeline["speed"] = speedup
+        return timeline
+    
+    def _prepare_command(self, file_path, temp_dir, timeline):
+        """Build the ffmpeg command applying a timeline's cuts and speed, as 16 kHz mono Opus"""
+        base_name, _ = os.path.splitext(source_name(file_path))
+        output_path = os.path.join(temp_dir, f"{base_name}.ogg")
+        filters = []
+        if timeline["regions"]:
+            selection = "+".join(
+                f"between(t,{start:.3f},{start + length:.3f})"
+                for _, start, length in timeline["regions"]
+            )
+            filters.append(f"aselect='{selection}',asetpts=N/SR/TB")
+        if timeline.get("speed", 1) != 1:
+            filters.append(f"atempo={timeline['speed']}")
+        cmd = [
+            "ffmpeg",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            "-af", ",".join(filters),
+            "-ac", "1",
+            "-ar", "16000",
+            "-c:a", "libopus",
+            "-b:a", f"{SPEECH_MAX_BITRATE_KBPS}k",
+            "-application", "voip",
+            "-y",
+            output_path
+        ]
+        return cmd, output_path
+    
+    def _source_time(self, timeline, seconds):
+        """Map a time in prepared audio back to the original audio"""
+        # Sped-up audio covers speed seconds of the source per second played
+        seconds = seconds * timeline.get("speed", 1)
+        regions = timeline["regions"]
+        if not regions:
+            return round(seconds, 3)
+        index = max(0, bisect.bisect_right([region[0] for region in regions], seconds) - 1)
+        prepared_start, original_start, length = regions[index]
+        return round(original_start + min(max(seconds - prepared_start, 0), length), 3)
+    
+    def _remap_transcript(self, transcript, timeline):
+        """Rewrite the segment times and duration of a transcript dict onto the original audio"""
+        for segment in transcript.get("segments") or []:
+            segment["start"] = self._source_time(timeline, segment.get("start", 0))
+            segment["end"] = self._source_time(timeline, segment.get("end", 0))
+        transcript["duration"] = timeline["duration"]
+        return transcript
+    
+    def _cached_result(self, cache_key, file_path, timestamp, start_time):
+        """Write a cached transcript to a new output file, or return None on a miss"""
+        if not self.cache:
+            return None
+        cached_content = self.cache.get(cache_key)
+        if cached_content is None:
+            return None
+        
+        output_path = self._output_path(file_path, timestamp)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(cached_content)
+        log(f"Transcript cache hit for {file_path}, wrote {output_path}")
+        return {
+            "content": self._preview(cached_content),
+            "file_path": output_path,
+            "elapsed_time": time.time() - start_time,
+            "cached": True
+        }
+    
+    def _cache_result(self, cache_key, result):
+        """Store a finished transcript in the cache, skipping errors and partial results"""
+        if self.cache and "error" not in result and not result.get("failed_chunks"):
+            with open(result["file_path"], "r", encoding="utf-8") as f:
+                self.cache.put(cache_key, f.read())
+    
+    def _output_path(self, file_path, timestamp=True):
+        """Build the path of the JSON transcript written for file_path"""
+        file_name = source_name(file_path)
+        base_name, _ = os.path.splitext(file_name)
+        
+        if timestamp:
+            timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_name = f"{base_name}_{timestamp_str}.json"
+        else:
+            output_name = f"{base_name}.json"
+        
+        return os.path.join(self.output_dir, output_name)
+    
+    def _preview(self, content):
+        """Truncate long transcript content for job results"""
+        return content[:2000] + "..." if len(content) > 2000 else content
+    
+    async def _transcribe_file(self, file_path, model, language=None,
+                               translate=False, timestamp=True, checkpoint_id=None,
+                               output_path=None, hedge_budget=None, mode="standard", timeline=None):
+        """Transcribe an audio file using Whisper API, without the transcript cache
+        
+        checkpoint_id names the checkpoint directory used if the file has to be
+        chunked; output_path overrides where the transcript is written. A
+        hedge_budget lets straggling uploads be duplicated. In "latency" mode
+        files under the size limit are also split and sent in parallel. A
+        timeline maps the transcript's times back onto the original audio.
+        """
+        try:
+            start_time = time.time()
             
-            output_path = os.path.join(self.output_dir, output_name)
+            # Check file size; remote media can't be uploaded as-is, so it always gets fitted or chunked
+            if is_remote_source(file_path):
+                oversized = True
+                log("Remote media is transcoded or chunked locally. Trying speech-optimized transcode.")
+            else:
+                file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+                oversized = file_size_mb > MAX_FILE_SIZE_MB
+                if oversized:
+                    log(f"File size ({file_size_mb:.2f} MB) exceeds limit of {MAX_FILE_SIZE_MB} MB. Trying speech-optimized transcode.")
             
-            # Process and save the response
-            content = self._process_response(response, output_path)
+            if oversized:
+                fit_dir = tempfile.mkdtemp()
+                try:
+                    fitted_path = await self._transcode_to_fit(file_path, fit_dir)
+                    if fitted_path:
+                        result = await self._transcribe_file(
+                            fitted_path, model, language, translate, timestamp,
+                            checkpoint_id=checkpoint_id, mode=mode, timeline=timeline
+                        )
+                        if "elapsed_time" in result:
+                            result["elapsed_time"] = time.time() - start_time
+                        return result
+                finally:
+                    shutil.rmtree(fit_dir, ignore_errors=True)
+                
+                log("Transcoded file would not fit under the limit. Using chunking.")
+                chunk_size_seconds = None
+                if mode == "latency":
+                    chunk_size_seconds = self._latency_chunk_seconds(await self._get_audio_duration(file_path))
+                return await self._transcribe_large_file(
+                    file_path, model, language, translate, timestamp, checkpoint_id,
+                    chunk_size_seconds, timeline
+                )
             
-            elapsed_time = time.time() - start_time
-            log(f"Transcription completed in {elapsed_time:.2f} seconds")
+            if mode == "latency":
+                chunk_size_seconds = self._latency_chunk_seconds(await self._get_audio_duration(file_path))
+                if chunk_size_seconds:
+                    log(f"Latency mode: splitting into chunks of up to {chunk_size_seconds} seconds")
+                    return await self._transcribe_large_file(
+                        file_path, model, language, translate, timestamp, checkpoint_id,
+                        chunk_size_seconds, timeline
+                    )
             
-            return {
-                "content": content,
-                "file_path": output_path,
-                "elapsed_time": elapsed_time
-            }
+            return await self._post_transcription(
+                file_path, model, language, translate, timestamp, output_path, start_time,
+                hedge_budget, timeline
+            )
             
         except Exception as e:
             log(f"Error in transcribe_file: {str(e)}")
             log(traceback.format_exc())
             return {"error": str(e)}
     
-    def _process_response(self, response, output_path):
-        """Process API response and save to file"""
+    def _latency_chunk_seconds(self, duration):
+        """Chunk length that splits audio of this duration into LATENCY_MODE_CHUNKS, or None if too short
+        
+        Long audio gets more chunks instead, since chunks never exceed CHUNK_SIZE_MINUTES.
+        """
+        if not duration or duration < 2 * LATENCY_MIN_CHUNK_SECONDS:
+            return None
+        chunk_size_seconds = max(LATENCY_MIN_CHUNK_SECONDS, int(duration / LATENCY_MODE_CHUNKS) + 1)
+        return min(chunk_size_seconds, CHUNK_SIZE_MINUTES * 60)
+    
+    async def _post_transcription(self, file_path, model, language, translate,
+                                  timestamp, output_path, start_time, hedge_budget=None, timeline=None):
+        """Send one file under the size limit to the API and save the transcript
+        
+        429, 5xx and connection errors are retried with backoff. While the
+        base URL's circuit breaker is open, calls wait for it to half-open,
+        each wait using up a retry, and fail once retries run out. Calls wait
+        for a slot in the base URL's adaptive concurrency window.
+        """
+        request = self._build_api_request(file_path, model, language, translate)
+        breaker = get_circuit_breaker(self.base_url)
+        limiter = get_concurrency_limiter(self.base_url, self.max_concurrent_chunks, self.adaptive_max_concurrency)
+        audio_seconds = await self._get_audio_duration(file_path)
+        
+        attempt = 0
+        while True:
+            open_seconds = breaker.before_call()
+            if open_seconds:
+                # Waiting on another caller's trial call doesn't use up a retry
+                if not breaker.trial_pending():
+                    if attempt >= MAX_API_RETRIES:
+                        return self._circuit_open_error(open_seconds)
+                    attempt += 1
+                    log(f"Circuit for {self.base_url} is open, waiting {open_seconds:.0f} seconds for a trial request")
+                await self._sleep(open_seconds)
+                continue
+            
+            try:
+                response = await self._send_hedged(file_path, request, limiter, audio_seconds, hedge_budget)
+            except self._retryable_errors as e:
+                delay = self._retry_after_failure(breaker, attempt, f"Connection error: {str(e)}")
+                if delay is None:
+                    raise
+            except self._client_errors:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                # Local errors, like an unreadable file, and cancellation say nothing about the API
+                # but must end a trial call
+                breaker.release_trial()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    breaker.record_success()
+                    return self._handle_api_response(
+                        response, file_path, timestamp, output_path, start_time, timeline
+                    )
+                retry_after = response.headers.get("Retry-After")
+                delay = self._retry_after_failure(
+                    breaker, attempt, f"API returned status code {response.status_code}", retry_after,
+                    api_failure=not (response.status_code == 429 and retry_after)
+                )
+                if delay is None:
+                    return self._handle_api_response(
+                        response, file_path, timestamp, output_path, start_time, timeline
+                    )
+            
+            await self._sleep(delay)
+            attempt += 1
+    
+    def _send_request(self, file_path, request, limiter, audio_seconds, started_at=None):
+        """Make one upload attempt inside a slot of the concurrency window
+        
+        started_at is the start time of a slot already taken for the attempt;
+        without one the attempt waits for a slot.
+        """
+        api_url, headers, data, content_type = request
+        status_code = None
+        if started_at is None:
+            started_at = limiter.acquire()
+        try:
+            with open(file_path, "rb") as audio_file:
+                files = {
+                    "file": (os.path.basename(file_path), audio_file, content_type)
+                }
+                response = get_session(self.base_url).post(
+                    api_url,
+                    headers=headers,
+                    data=data,
+                    files=files,
+                    timeout=300  # 5-minute timeout
+                )
+            status_code = response.status_code
+            return response
+        finally:
+            limiter.release(started_at, status_code, audio_seconds)
+    
+    async def _send_hedged(self, file_path, request, limiter, audio_seconds, hedge_budget):
+        """Make an upload attempt, duplicating it if it outlives recent calls
+        
+        Once the attempt has held its slot past HEDGE_LATENCY_PERCENTILE of
+        recent latency, and a slot is free and hedge_budget allows, a second
+        request is sent and the first 200 response wins. Time spent waiting
+        for the first slot doesn't count. The slower request is left to
+        finish in the background.
+        """
+        hedge_after = limiter.hedge_delay(audio_seconds) if hedge_budget else None
+        if hedge_after is None:
+            return self._send_request(file_path, request, limiter, audio_seconds)
+        
+        started_at = limiter.acquire()
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(self._send_request, file_path, request, limiter, audio_seconds, started_at)
+            done, _ = wait([primary], timeout=hedge_after)
+            hedge_started_at = None if done else self._claim_hedge(limiter, hedge_budget)
+            if hedge_started_at is None:
+                return primary.result()
+            
+            log(f"Upload of {file_path} passed {hedge_after:.1f} seconds, sending a hedged request")
+            hedge = executor.submit(
+                self._send_request, file_path, request, limiter, audio_seconds, hedge_started_at
+            )
+            pending = {primary, hedge}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None and future.result().status_code == 200:
+                        log(f"{'Hedged' if future is hedge else 'Original'} request for {file_path} won")
+                        return future.result()
+            return primary.result()
+        finally:
+            executor.shutdown(wait=False)
+    
+    def _claim_hedge(self, limiter, hedge_budget):
+        """Take a free slot and one hedge for a duplicate request, returning the slot's start time or None
+        
+        A hedge never queues for a slot: with the window full it would only
+        add to the load that is slowing the original down.
+        """
+        started_at = limiter.try_acquire()
+        if started_at is None:
+            return None
+        if not hedge_budget.take():
+            limiter.release(started_at, None, None)
+            return None
+        return started_at
+    
+    def _retry_after_failure(self, breaker, attempt, reason, retry_after=None, api_failure=True):
+        """Record a failed attempt and return the seconds to wait before retrying, or None to give up
+        
+        A 429 that says when to retry is the API pacing its callers rather
+        than failing, so it comes with api_failure=False and is left out of
+        the circuit breaker's count.
+        """
+        if api_failure:
+            breaker.record_failure()
+        else:
+            breaker.release_trial()
+        if attempt >= MAX_API_RETRIES:
+            log(f"{reason}, giving up after {attempt + 1} attempts")
+            return None
+        
+        delay = retry_delay(attempt, retry_after)
+        log(f"{reason}, retrying in {delay:.1f} seconds (retry {attempt + 1} of {MAX_API_RETRIES})")
+        return delay
+    
+    def _circuit_open_error(self, open_seconds):
+        """Build the error result for a call rejected by an open circuit"""
+        error_msg = f"Circuit open for {self.base_url} after repeated failures, retry in {open_seconds:.0f} seconds"
+        log(error_msg)
+        return {"error": error_msg}
+    
+    def _build_api_request(self, file_path, model, language, translate):
+        """Build the URL, headers, form data and content type for a transcription request"""
+        log(f"Sending file to API: {file_path}")
+        log(f"File size: {os.path.getsize(file_path) / (1024 * 1024):.2f} MB")
+        log(f"Model: {model}, Format: verbose_json, Language: {language}")
+        
+        # Prepare the API URL
+        api_url = f"{self.base_url}/audio/transcriptions"
+        
+        # Pick the upload content type from the file extension
+        content_type = AUDIO_CONTENT_TYPES.get(os.path.splitext(file_path)[1].lower(), "audio/mpeg")
+        
+        # Prepare data payload
+        data = {
+            "model": model,
+            "response_format": "verbose_json"
+        }
+        
+        # Add optional parameters
+        if language and language != "Automatic Detection":
+            data["language"] = language
+            
+        if translate:
+            data["prompt"] = "Please transcribe this audio and translate to English if needed."
+        
+        # Set up headers
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        # Make the API request
+        log(f"Making API request to {api_url}")
+        log(f"Request data: {data}")
+        
+        return api_url, headers, data, content_type
+    
+    def _handle_api_response(self, response, file_path, timestamp, output_path, start_time,
+                             timeline=None):
+        """Check an API response and write the transcript, returning the job result"""
+        # Log the full response for debugging
+        log(f"Response status code: {response.status_code}")
+        log(f"Response headers: {response.headers}")
+        
+        # Check for successful response
+        if response.status_code != 200:
+            error_msg = f"API request failed with status code {response.status_code}: {response.text}"
+            log(error_msg)
+            return {"error": error_msg}
+        
+        # Log response content
+        log(f"Response content type: {response.headers.get('Content-Type', 'unknown')}")
+        log(f"Raw response (first 500 chars): {response.text[:500]}")
+        
+        # Generate output file path
+        if output_path is None:
+            output_path = self._output_path(file_path, timestamp)
+        
+        # Process and save the response
+        content = self._process_response(response, output_path, timeline)
+        
+        elapsed_time = time.time() - start_time
+        log(f"Transcription completed in {elapsed_time:.2f} seconds")
+        
+        return {
+            "content": content,
+            "file_path": output_path,
+            "elapsed_time": elapsed_time
+        }
+    
+    def _process_response(self, response, output_path, timeline=None):
+        """Process API response and save to file, mapping times through timeline if given"""
         try:
             # Handle JSON formats
             try:
@@ -160,6 +1712,9 @@ class WhisperAPITranscriber:
                     
                     simplified_json["segments"] = simplified_segments
                 
+                if timeline:
+                    self._remap_transcript(simplified_json, timeline)
+                
                 # Write formatted JSON to file
                 with open(output_path, "w", encoding="utf-8") as f:
                     json.dump(simplified_json, f, indent=2)
@@ -183,210 +1738,1000 @@ class WhisperAPITranscriber:
             # Return raw response as fallback
             return response.text
     
-    def _transcribe_large_file(self, file_path, model, language=None,
-                               translate=False, timestamp=True):
-        """Handle transcription of files larger than the API limit by chunking"""
+    async def _extract_audio(self, file_path, temp_dir, media):
+        """Demux the audio stream out of a probed file into a local audio-only file
+        
+        Returns the path of the audio-only file, or None if the extraction
+        fails. The audio is stream copied when the API accepts its codec and
+        re-encoded to speech Opus otherwise.
+        """
+        try:
+            cmd, output_path = self._extract_audio_command(file_path, temp_dir, media["codec"])
+            result = await self._run_command(cmd)
+            
+            if result.returncode != 0:
+                log(f"ffmpeg error: {result.stderr}")
+                return None
+            
+            return self._check_extracted_audio(file_path, output_path)
+            
+        except Exception as e:
+            log(f"Error extracting audio stream: {str(e)}")
+            return None
+    
+    def _extract_audio_command(self, file_path, temp_dir, codec):
+        """Build the ffmpeg command copying out the first audio stream, and its output path"""
+        base_name, _ = os.path.splitext(source_name(file_path))
+        extension = STREAM_COPY_FORMATS.get(codec)
+        if extension:
+            codec_args = ["-c:a", "copy"]
+        else:
+            log(f"Audio codec {codec} cannot be uploaded as-is, re-encoding while demuxing")
+            extension = ".ogg"
+            codec_args = [
+                "-ac", "1",
+                "-ar", "16000",
+                "-c:a", "libopus",
+                "-b:a", f"{SPEECH_MAX_BITRATE_KBPS}k",
+                "-application", "voip",
+            ]
+        output_path = os.path.join(temp_dir, f"{base_name}{extension}")
+        cmd = [
+            "ffmpeg",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            *codec_args,
+            "-y",
+            output_path
+        ]
+        return cmd, output_path
+    
+    def _check_extracted_audio(self, file_path, output_path):
+        """Return the extracted audio's path if ffmpeg wrote anything, else None"""
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return None
+        audio_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        log(f"Demuxed audio stream of {file_path}: {audio_size_mb:.2f} MB")
+        return output_path
+    
+    async def _transcode_to_fit(self, file_path, temp_dir):
+        """Transcode to 16 kHz mono Opus at a bitrate sized to fit under MAX_FILE_SIZE_MB
+        
+        Returns the path of the transcoded file, or None if the audio is too
+        long to fit even at SPEECH_MIN_BITRATE_KBPS or the transcode fails.
+        The output keeps the input's base name so result files are named the same.
+        """
+        try:
+            duration = await self._get_audio_duration(file_path)
+            if not duration:
+                log("Could not determine audio duration for fit-to-limit transcode")
+                return None
+            
+            bitrate_kbps = self._fit_bitrate(duration)
+            if bitrate_kbps is None:
+                return None
+            
+            cmd, output_path = self._fit_command(file_path, temp_dir, bitrate_kbps)
+            result = await self._run_command(cmd)
+            
+            if result.returncode != 0:
+                log(f"ffmpeg error: {result.stderr}")
+                return None
+            
+            return self._check_fitted_file(output_path, bitrate_kbps)
+            
+        except Exception as e:
+            log(f"Error transcoding file to fit limit: {str(e)}")
+            return None
+    
+    def _fit_bitrate(self, duration):
+        """Opus bitrate in kbps that fits duration seconds under the limit, or None"""
+        # Leave headroom for the Ogg container and encoder bitrate overshoot
+        limit_bits = MAX_FILE_SIZE_MB * 1024 * 1024 * 8 * 0.9
+        bitrate_kbps = int(limit_bits / duration / 1000)
+        if bitrate_kbps < SPEECH_MIN_BITRATE_KBPS:
+            log(f"Audio too long ({duration:.2f} seconds) to fit at {SPEECH_MIN_BITRATE_KBPS} kbps")
+            return None
+        return min(bitrate_kbps, SPEECH_MAX_BITRATE_KBPS)
+    
+    def _fit_command(self, file_path, temp_dir, bitrate_kbps):
+        """Build the speech-optimized Opus transcode command and its output path"""
+        base_name, _ = os.path.splitext(source_name(file_path))
+        output_path = os.path.join(temp_dir, f"{base_name}.ogg")
+        cmd = [
+            "ffmpeg",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            "-ac", "1",
+            "-ar", "16000",
+            "-c:a", "libopus",
+            "-b:a", f"{bitrate_kbps}k",
+            "-application", "voip",
+            "-y",
+            output_path
+        ]
+        return cmd, output_path
+    
+    def _check_fitted_file(self, output_path, bitrate_kbps):
+        """Return the transcoded file's path if it fits under the limit, else None"""
+        fitted_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        log(f"Transcoded to {bitrate_kbps} kbps Opus: {fitted_size_mb:.2f} MB")
+        if fitted_size_mb > MAX_FILE_SIZE_MB:
+            return None
+        return output_path
+    
+    async def _transcribe_large_file(self, file_path, model, language=None,
+                                     translate=False, timestamp=True, checkpoint_id=None,
+                                     chunk_size_seconds=None, timeline=None):
+        """Handle transcription of files larger than the API limit by chunking
+        
+        Chunk audio and per-chunk results are checkpointed under
+        <output_dir>/checkpoints/<checkpoint_id>. If a checkpoint for the same
+        id already exists, only the chunks without a result are transcribed.
+        """
+        try:
+            start_time = time.time()
+            checkpoint_id = checkpoint_id or str(uuid.uuid4())
+            checkpoint_dir = self._checkpoint_dir(checkpoint_id)
+            
+            lock = _checkpoint_lock(checkpoint_id)
+            await self._acquire_lock(lock)
+            try:
+                manifest = self._load_manifest(checkpoint_dir)
+                if manifest is not None:
+                    log(f"Resuming from checkpoint {checkpoint_dir}")
+                    missing_audio = self._missing_chunk_audio(checkpoint_dir, manifest)
+                    if missing_audio:
+                        log(f"Audio for {len(missing_audio)} pending chunks is missing, splitting again")
+                        chunk_files = await self._split_audio_into_chunks(
+                            file_path, checkpoint_dir, manifest["windows"],
+                            manifest["codec_args"], manifest["extension"]
+                        )
+                        if not chunk_files:
+                            return {"error": "Failed to split audio file into chunks"}
+                        for chunk in chunk_files:
+                            self._record_chunk(checkpoint_dir, manifest, chunk)
+                    return await self._transcribe_checkpoint(checkpoint_id, manifest, timestamp, start_time)
+                
+                # Drop leftovers of a split that never got as far as its manifest
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+                os.makedirs(checkpoint_dir, exist_ok=True)
+                log(f"Created checkpoint directory for chunks: {checkpoint_dir}")
+                log(f"Processing large file: {file_path}")
+                result = await self._split_and_transcribe(
+                    file_path, checkpoint_id, model, language, translate,
+                    chunk_size_seconds, timestamp, start_time, timeline
+                )
+                if self._load_manifest(checkpoint_dir) is None:
+                    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+                return result
+            finally:
+                lock.release()
+            
+        except Exception as e:
+            log(f"Error in transcribe_large_file: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": str(e)}
+    
+    def resume_transcription(self, checkpoint_id, timestamp=True):
+        """Re-transcribe the chunks of a checkpointed job that have no result yet
+        
+        Used to retry the failed chunks of a finished job. Model, language and
+        translate settings come from the checkpoint manifest.
+        """
+        return run_sync(self._resume_transcription(checkpoint_id, timestamp))
+    
+    async def _resume_transcription(self, checkpoint_id, timestamp):
+        """Transcribe a checkpoint's pending chunks under its lock for resume_transcription"""
+        try:
+            start_time = time.time()
+            checkpoint_dir = self._checkpoint_dir(checkpoint_id)
+            
+            lock = _checkpoint_lock(checkpoint_id)
+            await self._acquire_lock(lock)
+            try:
+                manifest = self._load_manifest(checkpoint_dir)
+                if manifest is None:
+                    return {"error": f"No checkpoint found for {checkpoint_id}"}
+                
+                missing_audio = self._missing_chunk_audio(checkpoint_dir, manifest)
+                if missing_audio:
+                    return {"error": f"Audio for chunk {missing_audio[0]['index']+1} is no longer available"}
+                
+                result = await self._transcribe_checkpoint(checkpoint_id, manifest, timestamp, start_time)
+            finally:
+                lock.release()
+            
+            self._cache_result(checkpoint_id, result)
+            return result
+            
+        except Exception as e:
+            log(f"Error in resume_transcription: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": str(e)}
+    
+    def _checkpoint_dir(self, checkpoint_id):
+        """Directory holding the chunk audio, chunk results and manifest of a job"""
+        return os.path.join(self.output_dir, CHECKPOINT_DIR, checkpoint_id)
+    
+    async def _split_and_transcribe(self, file_path, checkpoint_id, model, language, translate,
+                                    chunk_size_seconds, timestamp, start_time, timeline=None):
+        """Cut a new job into chunks, transcribing each one as soon as ffmpeg closes it
+        
+        Uploads overlap with the rest of the split instead of waiting for it.
+        manifest.json is written from the planned windows before the first
+        upload and updated with each chunk's actual cut, so neither a crash
+        nor a split that fails partway loses the chunk results already paid
+        for. Chunks the split never produced are reported as failed.
+        """
+        checkpoint_dir = self._checkpoint_dir(checkpoint_id)
+        plan = await self._plan_chunks(file_path, chunk_size_seconds)
+        if "error" in plan:
+            return plan
+        
+        manifest = self._write_manifest(
+            file_path, checkpoint_dir, model, language, translate,
+            plan["windows"], plan["codec_args"], plan["extension"], timeline
+        )
+        produced = []
+        
+        async def produced_chunks():
+            async for chunk in self._iter_audio_chunks(
+                file_path, checkpoint_dir, plan["windows"], plan["codec_args"], plan["extension"]
+            ):
+                self._record_chunk(checkpoint_dir, manifest, chunk)
+                produced.append(chunk)
+                yield chunk
+        
+        log("Starting pipelined audio splitting and transcription...")
+        try:
+            failed_chunks = await self._transcribe_chunks(
+                produced_chunks(), model, language, translate, checkpoint_dir,
+                expected=len(plan["windows"])
+            )
+        except Exception as e:
+            log(f"Error splitting audio: {str(e)}")
+            failed_chunks = self._unfinished_chunks(checkpoint_dir, manifest)
+        
+        if not produced:
+            log("ERROR: Failed to split audio file into chunks")
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            return {"error": "Failed to split audio file into chunks"}
+        
+        log(f"Split audio into {len(produced)} of {len(manifest['chunks'])} chunks")
+        return self._finish_checkpoint(checkpoint_id, manifest, failed_chunks, timestamp, start_time)
+    
+    async def _plan_chunks(self, file_path, chunk_size_seconds=None):
+        """Decide where chunks are cut and how they are encoded"""
+        # Get audio duration using ffprobe
+        log("Getting audio duration with ffprobe...")
+        duration = await self._get_audio_duration(file_path)
+        if duration is None:
+            log("ERROR: Could not determine audio duration")
+            return {"error": "Could not determine audio duration"}
+            
+        log(f"Audio duration: {duration:.2f} seconds")
+        
+        # Decide how chunks are encoded and where they are cut
+        codec_args, extension, chunk_size_seconds = await self._plan_chunk_encoding(
+            file_path, chunk_size_seconds or CHUNK_SIZE_MINUTES * 60
+        )
+        # Remote media would be read once more just for the silences, so its cuts stay nominal
+        silences = []
+        if SILENCE_ALIGNED_CHUNKS and not is_remote_source(file_path):
+            silences = await self._detect_silences(file_path)
+        windows = self._plan_chunk_boundaries(duration, chunk_size_seconds, silences)
+        log(f"Splitting into {len(windows)} chunks of up to {chunk_size_seconds} seconds each")
+        
+        return {"windows": windows, "codec_args": codec_args, "extension": extension}
+    
+    def _write_manifest(self, file_path, checkpoint_dir, model, language, translate,
+                        windows, codec_args, extension, timeline=None):
+        """Write manifest.json describing a planned split, returning the manifest
+        
+        Chunks are listed with their planned windows until _record_chunk
+        replaces each with the cut ffmpeg actually made.
+        """
+        manifest = {
+            "source_name": source_name(file_path),
+            "model": model,
+            "language": language,
+            "translate": translate,
+            "windows": windows,
+            "codec_args": codec_args,
+            "extension": extension,
+            "timeline": timeline,
+            "chunks": [
+                {
+                    "index": index,
+                    "file": f"chunk_{index:03d}{extension}",
+                    "start": window["start"],
+                    "end": window["end"],
+                    "overlap": window["overlap"]
+                }
+                for index, window in enumerate(windows)
+            ]
+        }
+        self._save_manifest(checkpoint_dir, manifest)
+        return manifest
+    
+    def _record_chunk(self, checkpoint_dir, manifest, chunk):
+        """Update the manifest with the cut of a chunk ffmpeg has just written"""
+        entry = {
+            "index": chunk["index"],
+            "file": os.path.basename(chunk["path"]),
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "overlap": chunk["overlap"]
+        }
+        if chunk["index"] < len(manifest["chunks"]):
+            manifest["chunks"][chunk["index"]] = entry
+        else:
+            manifest["chunks"].append(entry)
+        self._save_manifest(checkpoint_dir, manifest)
+    
+    def _save_manifest(self, checkpoint_dir, manifest):
+        """Atomically replace a checkpoint's manifest.json"""
+        manifest_path = os.path.join(checkpoint_dir, "manifest.json")
+        with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+    
+    def _unfinished_chunks(self, checkpoint_dir, manifest):
+        """Indexes of the manifest's chunks that have no checkpointed result"""
+        return [
+            chunk["index"] for chunk in manifest["chunks"]
+            if self._load_chunk_result(checkpoint_dir, chunk) is None
+        ]
+    
+    def _missing_chunk_audio(self, checkpoint_dir, manifest):
+        """Chunks of a manifest that have neither a result nor their audio file"""
+        return [
+            chunk for chunk in manifest["chunks"]
+            if self._load_chunk_result(checkpoint_dir, chunk) is None
+            and not os.path.exists(os.path.join(checkpoint_dir, chunk["file"]))
+        ]
+    
+    def _load_manifest(self, checkpoint_dir):
+        """Load a checkpoint manifest, or None if there is no usable one"""
+        try:
+            with open(os.path.join(checkpoint_dir, "manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _chunk_result_path(self, checkpoint_dir, chunk):
+        """Path of the checkpointed transcript for a chunk"""
+        return os.path.join(checkpoint_dir, f"chunk_{chunk['index']:03d}.result.json")
+    
+    def _load_chunk_result(self, checkpoint_dir, chunk):
+        """Return a chunk's checkpointed transcript content, or None if it has none"""
+        try:
+            with open(self._chunk_result_path(checkpoint_dir, chunk), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    async def _transcribe_checkpoint(self, checkpoint_id, manifest, timestamp, start_time):
+        """Transcribe the pending chunks of a checkpoint and merge every chunk result
+        
+        The checkpoint is removed once all chunks have a result. Otherwise it is
+        kept, and the result lists the failed chunks and the checkpoint_id to retry.
+        """
+        checkpoint_dir = self._checkpoint_dir(checkpoint_id)
+        pending = self._pending_chunks(checkpoint_dir, manifest)
+        failed_chunks = await self._transcribe_chunks(
+            pending, manifest["model"], manifest["language"], manifest["translate"], checkpoint_dir
+        )
+        return self._finish_checkpoint(checkpoint_id, manifest, failed_chunks, timestamp, start_time)
+    
+    def _pending_chunks(self, checkpoint_dir, manifest):
+        """Chunk dicts, with audio paths, for the chunks that have no result yet"""
+        pending = []
+        for chunk in manifest["chunks"]:
+            if self._load_chunk_result(checkpoint_dir, chunk) is None:
+                pending.append(dict(chunk, path=os.path.join(checkpoint_dir, chunk["file"])))
+        log(f"{len(pending)} of {len(manifest['chunks'])} chunks need transcription")
+        return pending
+    
+    def _finish_checkpoint(self, checkpoint_id, manifest, failed_chunks, timestamp, start_time):
+        """Merge every checkpointed chunk result into the final transcript"""
+        checkpoint_dir = self._checkpoint_dir(checkpoint_id)
+        chunk_results = []
+        previous_present = False
+        for chunk in manifest["chunks"]:
+            content = self._load_chunk_result(checkpoint_dir, chunk)
+            if content is not None:
+                # Only stitch onto the previous chunk if it was actually transcribed
+                chunk_results.append({
+                    "content": content,
+                    "time_offset": chunk["start"],
+                    "overlap": chunk["overlap"] if previous_present else 0
+                })
+            previous_present = content is not None
+        
+        concurrency = get_concurrency_limiter(self.base_url, self.max_concurrent_chunks, self.adaptive_max_concurrency).limit
+        if not chunk_results:
+            return {
+                "error": "All chunks failed to transcribe",
+                "failed_chunks": failed_chunks,
+                "checkpoint_id": checkpoint_id,
+                "concurrency": concurrency
+            }
+        
+        # Merge the chunks
+        merged_content = self._merge_transcriptions(chunk_results)
+        if manifest.get("timeline"):
+            merged_content = json.dumps(
+                self._remap_transcript(json.loads(merged_content), manifest["timeline"]), indent=2
+            )
+        
+        # Write the final output
+        output_path = self._output_path(manifest["source_name"], timestamp)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(merged_content)
+        
+        result = {
+            "content": self._preview(merged_content),
+            "file_path": output_path,
+            "elapsed_time": time.time() - start_time,
+            "concurrency": concurrency
+        }
+        
+        if failed_chunks:
+            log(f"{len(failed_chunks)} chunks failed, keeping checkpoint {checkpoint_dir} for retry")
+            result["failed_chunks"] = failed_chunks
+            result["checkpoint_id"] = checkpoint_id
+        else:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            log(f"Removed checkpoint directory: {checkpoint_dir}")
+        
+        self._prune_checkpoints()
+        return result
+    
+    def _prune_checkpoints(self):
+        """Delete checkpoints unused for CHECKPOINT_MAX_AGE_HOURS, then the least recently used over the size cap
+        
+        Checkpoints outlive their job whenever chunks failed or the process
+        died mid-job. Checkpoints a job is still working on are skipped, as are
+        any that other jobs finish or prune while this one looks at them.
+        """
+        checkpoints_root = os.path.join(self.output_dir, CHECKPOINT_DIR)
         try:
-            start_time = time.time()
-            
-            # Create a temporary directory for chunks
-            temp_dir = tempfile.mkdtemp()
-            log(f"Created temporary directory for chunks: {temp_dir}")
-            log(f"Processing large file: {file_path}")
-            
-            # Get audio duration using ffprobe
-            log("Getting audio duration with ffprobe...")
-            duration = self._get_audio_duration(file_path)
-            if duration is None:
-                log("ERROR: Could not determine audio duration")
-                return {"error": "Could not determine audio duration"}
-                
-            log(f"Audio duration: {duration:.2f} seconds")
-            
-            # Calculate number of chunks needed
-            chunk_size_seconds = CHUNK_SIZE_MINUTES * 60
-            num_chunks = max(1, int(duration / chunk_size_seconds) + (1 if duration % chunk_size_seconds > 0 else 0))
-            log(f"Splitting into {num_chunks} chunks of {CHUNK_SIZE_MINUTES} minutes each")
-            
-            # Split audio into chunks
-            log("Starting audio splitting process...")
-            chunk_files = self._split_audio_into_chunks(file_path, temp_dir, chunk_size_seconds, num_chunks)
-            if not chunk_files:
-                log("ERROR: Failed to split audio file into chunks")
-                return {"error": "Failed to split audio file into chunks"}
-            
-            log(f"Successfully split audio into {len(chunk_files)} chunks")
-            
-            # Process each chunk
-            chunk_results = []
-            chunk_output_files = []  # Track chunk output files for cleanup
-            
-            for i, chunk_file in enumerate(chunk_files):
-                log(f"Transcribing chunk {i+1}/{len(chunk_files)}: {chunk_file}")
-                log(f"Time offset for this chunk: {i * chunk_size_seconds} seconds")
-                
-                # Calculate time offset for this chunk
-                time_offset = i * chunk_size_seconds
-                
-                # Transcribe the chunk
-                log(f"Sending chunk {i+1} to transcribe_file method...")
-                chunk_result = self.transcribe_file(
-                    chunk_file, model, language, translate, False
-                )
-                
-                log(f"Chunk {i+1} transcription complete")
-                if "error" in chunk_result:
-                    log(f"ERROR in chunk {i+1}: {chunk_result['error']}")
-                else:
-                    log(f"Chunk {i+1} processed successfully, content length: {len(chunk_result.get('content', ''))}")
-                    # Track output file for later cleanup
-                    if "file_path" in chunk_result:
-                        chunk_output_files.append(chunk_result["file_path"])
-                
-                if "error" in chunk_result:
-                    log(f"Error in chunk {i+1}: {chunk_result['error']}")
-                    continue
-                
-                # Add this chunk's result with time offset information
-                chunk_result["time_offset"] = time_offset
-                chunk_results.append(chunk_result)
-            
-            # Generate output file name
-            file_name = os.path.basename(file_path)
-            base_name, _ = os.path.splitext(file_name)
-            
-            if timestamp:
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_name = f"{base_name}_{timestamp_str}.json"
-            else:
-                output_name = f"{base_name}.json"
-            
-            output_path = os.path.join(self.output_dir, output_name)
-            
-            # Merge the chunks
-            merged_content = self._merge_transcriptions(chunk_results)
-            
-            # Write the final output
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(merged_content)
-            
-            # Clean up temporary files
+            entries = [entry for entry in os.scandir(checkpoints_root) if entry.is_dir()]
+        except OSError:
+            return
+        
+        checkpoints = []
+        for entry in entries:
+            usage = self._checkpoint_usage(entry.path)
+            if usage is not None:
+                checkpoints.append((*usage, entry.name))
+        total_size = sum(size for _, size, _ in checkpoints)
+        max_size_bytes = CHECKPOINT_MAX_SIZE_MB * 1024 * 1024
+        expires_before = time.time() - CHECKPOINT_MAX_AGE_HOURS * 3600
+        for last_used, size, checkpoint_id in sorted(checkpoints):
+            if last_used >= expires_before and total_size <= max_size_bytes:
+                break
+            lock = _checkpoint_lock(checkpoint_id)
+            if not lock.acquire(blocking=False):
+                continue
             try:
-                # Clean up individual chunk output files
-                log(f"Cleaning up {len(chunk_output_files)} chunk output files")
-                for chunk_file in chunk_output_files:
-                    if os.path.exists(chunk_file):
-                        os.remove(chunk_file)
-                        log(f"Removed chunk output file: {chunk_file}")
-                
-                # Clean up temporary directory with audio chunks
-                import shutil
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                log(f"Removed temporary directory: {temp_dir}")
-            except Exception as cleanup_error:
-                log(f"Warning: Failed to remove some temporary files: {cleanup_error}")
-            
-            elapsed_time = time.time() - start_time
-            
-            return {
-                "content": merged_content[:2000] + "..." if len(merged_content) > 2000 else merged_content,
-                "file_path": output_path,
-                "elapsed_time": elapsed_time
-            }
+                shutil.rmtree(self._checkpoint_dir(checkpoint_id), ignore_errors=True)
+                total_size -= size
+                log(f"Evicted checkpoint {checkpoint_id}")
+            finally:
+                lock.release()
+    
+    def _checkpoint_usage(self, checkpoint_dir):
+        """Last modification time and total size of the files in a checkpoint directory
+        
+        Returns None if the directory is gone. Files removed while it is
+        scanned, like chunk audio deleted after upload, are left out.
+        """
+        try:
+            last_used = os.path.getmtime(checkpoint_dir)
+            entries = list(os.scandir(checkpoint_dir))
+        except OSError:
+            return None
+        size = 0
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat = entry.stat()
+                    last_used = max(last_used, stat.st_mtime)
+                    size += stat.st_size
+            except OSError:
+                continue
+        return last_used, size
+    
+    async def _transcribe_chunks(self, chunks, model, language, translate, checkpoint_dir, expected=None):
+        """Transcribe chunk dicts with a bounded thread pool, checkpointing each result
+        
+        chunks may be an async generator still cutting audio; each chunk is
+        submitted as soon as it is yielded, and expected gives the number it
+        will yield.
+        A chunk's transcript is written into checkpoint_dir and its audio deleted
+        as soon as it succeeds. Returns the indexes of the chunks that failed.
+        """
+        total = len(chunks) if expected is None else expected
+        if not total:
+            return []
+        max_workers = min(self._chunk_workers(), total)
+        log(f"Transcribing {total} chunks with up to {max_workers} in flight")
+        hedge_budget = self._hedge_budget(total)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for chunk in iterate_sync(chunks):
+                log(f"Submitting chunk {chunk['index']+1}: {chunk['path']} (offset {chunk['start']} seconds)")
+                future = executor.submit(run_sync, self._transcribe_chunk(
+                    chunk, model, language, translate, checkpoint_dir, hedge_budget
+                ))
+                futures[future] = chunk
             
+            failed_chunks = [futures[future]["index"] for future in as_completed(futures) if not future.result()]
+        
+        return sorted(failed_chunks)
+    
+    async def _transcribe_chunk(self, chunk, model, language, translate, checkpoint_dir, hedge_budget):
+        """Transcribe one chunk and checkpoint its result, returning whether it succeeded"""
+        try:
+            chunk_result = await self._transcribe_file(
+                chunk["path"], model, language, translate, False,
+                output_path=f"{self._chunk_result_path(checkpoint_dir, chunk)}.tmp",
+                hedge_budget=hedge_budget
+            )
         except Exception as e:
-            log(f"Error in transcribe_large_file: {str(e)}")
-            log(traceback.format_exc())
-            return {"error": str(e)}
+            chunk_result = {"error": str(e)}
+        return self._checkpoint_chunk(checkpoint_dir, chunk, chunk_result)
+    
+    def _hedge_budget(self, total):
+        """Create the HedgeBudget for a job of total chunks, or None if hedging is off"""
+        if not self.hedged_requests:
+            return None
+        return HedgeBudget(max(1, int(total * HEDGE_MAX_EXTRA_FRACTION)))
+    
+    def _chunk_workers(self):
+        """Chunks a job keeps in flight; the base URL's window may allow fewer
+        
+        With adaptive concurrency a job offers up to the ceiling, so the window
+        can grow past max_concurrent_chunks.
+        """
+        return self.adaptive_max_concurrency if ADAPTIVE_CONCURRENCY else self.max_concurrent_chunks
+    
+    def _checkpoint_chunk(self, checkpoint_dir, chunk, chunk_result):
+        """Publish a finished chunk's transcript and delete its audio; False if it failed"""
+        index = chunk["index"]
+        if "error" in chunk_result:
+            log(f"Error in chunk {index+1}: {chunk_result['error']}")
+            return False
+        
+        # Publish the checkpoint only once it is complete, then drop the audio
+        os.replace(chunk_result["file_path"], self._chunk_result_path(checkpoint_dir, chunk))
+        try:
+            os.remove(chunk["path"])
+        except OSError:
+            pass
+        log(f"Chunk {index+1} processed successfully, content length: {len(chunk_result.get('content', ''))}")
+        return True
+    
+    async def _run_command(self, cmd):
+        """Run an external command, capturing its text output"""
+        log(f"Running command: {' '.join(cmd)}")
+        return subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    
+    async def _run_blocking(self, func, *args):
+        """Call a blocking function; the async engine runs it on a worker thread instead"""
+        return func(*args)
+    
+    async def _sleep(self, seconds):
+        """Wait between retries"""
+        time.sleep(seconds)
+    
+    async def _acquire_lock(self, lock):
+        """Wait for a threading lock shared with other jobs, like a checkpoint's"""
+        lock.acquire()
+    
+    def probe(self, file_path):
+        """Describe a media file with a single ffprobe call
+        
+        Returns {"duration", "format", "codec", "bit_rate", "channels",
+        "sample_rate", "has_video", "streams"}, where format is ffprobe's
+        container name, the audio fields describe the first audio stream
+        (None without one) and streams lists every stream's index, type and
+        codec. Returns None if ffprobe cannot read the file. Results are
+        cached until the file's size or mtime changes; remote URLs are probed
+        once per transcribe_url call.
+        """
+        return run_sync(self._probe(file_path))
+    
+    async def _probe(self, file_path):
+        """Probe a media file for probe(), from the caches when possible"""
+        try:
+            media = self._known_probe(file_path)
+            if media is not None:
+                return media
             
-    def _get_audio_duration(self, file_path):
-        """Get the duration of an audio file in seconds using ffprobe"""
-        try:
-            result = subprocess.run(
-                [
-                    "ffprobe", 
-                    "-v", "error", 
-                    "-show_entries", "format=duration", 
-                    "-of", "default=noprint_wrappers=1:nokey=1", 
-                    file_path
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+            result = await self._run_command(self._probe_command(file_path))
             
             if result.returncode != 0:
                 log(f"ffprobe error: {result.stderr}")
                 return None
-                
-            duration = float(result.stdout.strip())
-            return duration
+            
+            media = self._parse_probe(result.stdout)
+            self._remember_probe(file_path, media)
+            return media
             
         except Exception as e:
-            log(f"Error getting audio duration: {str(e)}")
+            log(f"Error probing media file: {str(e)}")
             return None
     
-    def _split_audio_into_chunks(self, file_path, temp_dir, chunk_size_seconds, num_chunks):
-        """Split an audio file into chunks of specified length"""
+    def _known_probe(self, file_path):
+        """Cached probe of a local file, or this job's probe of a remote URL, else None"""
+        if is_remote_source(file_path):
+            return self.remote_probes.get(file_path)
+        return get_cached_probe(file_path)
+    
+    def _remember_probe(self, file_path, media):
+        """Cache a probe: local files by their contents, remote URLs for the current job"""
+        if is_remote_source(file_path):
+            self.remote_probes[file_path] = media
+        else:
+            cache_probe(file_path, media)
+    
+    def _probe_command(self, file_path):
+        """Build the ffprobe command reporting a file's format and streams as JSON"""
+        return [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries",
+            "format=format_name,duration,bit_rate"
+            ":stream=index,codec_type,codec_name,bit_rate,channels,sample_rate,duration"
+            ":stream_disposition=attached_pic",
+            "-of", "json",
+            *self._input_args(file_path)
+        ]
+    
+    def _input_args(self, file_path):
+        """ffmpeg and ffprobe options opening file_path
+        
+        Remote media is limited to plain HTTP, which only reaches the job's
+        MediaProxy, and to audio and video demuxers, so a crafted file can't
+        make ffmpeg open playlists, other protocols or local files.
+        """
+        if is_remote_source(file_path):
+            return [
+                "-protocol_whitelist", REMOTE_MEDIA_PROTOCOLS,
+                "-format_whitelist", REMOTE_MEDIA_DEMUXERS,
+                "-i", file_path
+            ]
+        return ["-i", file_path]
+    
+    def _parse_probe(self, stdout):
+        """Parse ffprobe JSON output into the dict returned by probe()
+        
+        Cover art attached to audio files does not count as a video track.
+        """
+        probe = json.loads(stdout)
+        streams = probe.get("streams") or []
+        format_info = probe.get("format") or {}
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+        has_video = any(
+            s.get("codec_type") == "video" and not s.get("disposition", {}).get("attached_pic")
+            for s in streams
+        )
+        
+        # Containers like webm/ogg often only report the bitrate at format level.
+        # With a video track the format bitrate counts the video too, so it is no use.
+        bit_rate = audio.get("bit_rate")
+        if not bit_rate and not has_video:
+            bit_rate = format_info.get("bit_rate")
+        
+        return {
+            "duration": _probe_number(format_info.get("duration") or audio.get("duration"), float),
+            "format": format_info.get("format_name"),
+            "codec": audio.get("codec_name"),
+            "bit_rate": _probe_number(bit_rate, int),
+            "channels": _probe_number(audio.get("channels"), int),
+            "sample_rate": _probe_number(audio.get("sample_rate"), int),
+            "has_video": has_video,
+            "streams": [
+                {"index": s.get("index"), "type": s.get("codec_type"), "codec": s.get("codec_name")}
+                for s in streams
+            ]
+        }
+    
+    async def _get_audio_duration(self, file_path):
+        """Get the duration of an audio file in seconds from its probe"""
+        media = await self._probe(file_path)
+        return media["duration"] if media else None
+    
+    async def _split_audio_into_chunks(self, file_path, temp_dir, windows, codec_args, extension):
+        """Split an audio file into the planned chunk windows
+        
+        Returns a list of {"index", "path", "start", "end", "overlap"} dicts in
+        order, or an empty list if the split failed.
+        """
         try:
-            chunk_files = []
-            
-            for i in range(num_chunks):
-                start_time = i * chunk_size_seconds
-                output_chunk = os.path.join(temp_dir, f"chunk_{i:03d}.mp3")
-                
-                # For the last chunk, don't specify duration to get until the end
-                if i == num_chunks - 1:
-                    cmd = [
-                        "ffmpeg",
-                        "-i", file_path,
-                        "-ss", str(start_time),
-                        "-c:a", "libmp3lame",
-                        "-q:a", "4",
-                        "-y",
-                        output_chunk
-                    ]
-                else:
-                    cmd = [
-                        "ffmpeg",
-                        "-i", file_path,
-                        "-ss", str(start_time),
-                        "-t", str(chunk_size_seconds),
-                        "-c:a", "libmp3lame",
-                        "-q:a", "4",
-                        "-y",
-                        output_chunk
-                    ]
-                
-                log(f"Running ffmpeg command: {' '.join(cmd)}")
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
+            return [
+                chunk async for chunk in
+                self._iter_audio_chunks(file_path, temp_dir, windows, codec_args, extension)
+            ]
+        except Exception as e:
+            log(f"Error splitting audio: {str(e)}")
+            return []
+    
+    async def _iter_audio_chunks(self, file_path, temp_dir, windows, codec_args, extension):
+        """Cut the planned chunk windows, yielding each chunk dict as soon as it is written
+        
+        Non-overlapping windows are cut in a single ffmpeg pass with the segment
+        muxer, which writes a CSV row to stdout as it closes each segment.
+        Overlapping windows cannot come out of the segment muxer, so each one
+        is cut with an input-side seek that only decodes that window. Raises
+        RuntimeError if ffmpeg fails or any window is not written, after
+        yielding the chunks that were, so a window never drops out silently.
+        """
+        if any(window["overlap"] > 0 for window in windows):
+            failed = []
+            for i, window in enumerate(windows):
+                cmd, chunk = self._window_command(file_path, temp_dir, i, window, codec_args, extension)
+                result = await self._run_command(cmd)
                 
                 if result.returncode != 0:
                     log(f"ffmpeg error: {result.stderr}")
+                    failed.append(i + 1)
                     continue
-                    
-                chunk_files.append(output_chunk)
                 
-            return chunk_files
+                yield chunk
+            
+            if failed:
+                raise RuntimeError(f"ffmpeg failed to cut chunks {', '.join(map(str, failed))}")
+            return
+        
+        cmd = self._segment_command(file_path, temp_dir, windows, codec_args, extension)
+        rows = self._command_rows(cmd)
+        index = 0
+        try:
+            async for row in rows:
+                chunk = self._segment_list_chunk(row, temp_dir, index)
+                if chunk:
+                    index += 1
+                    yield chunk
+        finally:
+            # Stop ffmpeg if the consumer gave up before the split was done
+            await rows.aclose()
+        
+        if index < len(windows):
+            raise RuntimeError(f"ffmpeg wrote {index} of {len(windows)} chunks")
+    
+    async def _command_rows(self, cmd):
+        """Run a command, yielding the CSV rows it prints on stdout as they are written
+        
+        The command is killed if iteration stops early, and RuntimeError is
+        raised if it exits with an error.
+        """
+        log(f"Running command: {' '.join(cmd)}")
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True
+            )
+            finished = False
+            try:
+                for row in csv.reader(process.stdout):
+                    yield row
+                finished = True
+            finally:
+                if not finished and process.poll() is None:
+                    process.kill()
+                process.wait()
+            
+            if process.returncode != 0:
+                stderr_file.seek(0)
+                log(f"{cmd[0]} error: {stderr_file.read().decode('utf-8', errors='replace')}")
+                raise RuntimeError(f"{cmd[0]} exited with status {process.returncode}")
+    
+    def _segment_command(self, file_path, temp_dir, windows, codec_args, extension):
+        """Build the single-pass segment muxer command, which lists segments on stdout as CSV"""
+        output_pattern = os.path.join(temp_dir, f"chunk_%03d{extension}")
+        cut_times = ",".join(f"{window['start']:.3f}" for window in windows[1:])
+        
+        return [
+            "ffmpeg",
+            "-nostdin",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            *codec_args,
+            "-f", "segment",
+            *(["-segment_times", cut_times] if cut_times else ["-segment_time", str(windows[0]["end"] + 1)]),
+            "-segment_list", "pipe:1",
+            "-segment_list_type", "csv",
+            "-reset_timestamps", "1",
+            "-y",
+            output_pattern
+        ]
+    
+    def _window_command(self, file_path, temp_dir, index, window, codec_args, extension):
+        """Build the input-seeking command cutting one window, and the chunk it produces"""
+        output_chunk = os.path.join(temp_dir, f"chunk_{index:03d}{extension}")
+        cmd = [
+            "ffmpeg",
+            "-ss", f"{window['start']:.3f}",
+            "-t", f"{window['end'] - window['start']:.3f}",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            *codec_args,
+            "-y",
+            output_chunk
+        ]
+        chunk = {
+            "index": index,
+            "path": output_chunk,
+            "start": window["start"],
+            "end": window["end"],
+            "overlap": window["overlap"]
+        }
+        return cmd, chunk
+    
+    async def _detect_silences(self, file_path, min_seconds=SILENCE_MIN_SECONDS):
+        """Find pauses in the audio with ffmpeg silencedetect, as (start, end) pairs"""
+        try:
+            result = await self._run_command(self._silence_command(file_path, min_seconds))
+            
+            if result.returncode != 0:
+                log(f"ffmpeg error: {result.stderr}")
+                return []
+            
+            return self._parse_silences(result.stderr)
             
         except Exception as e:
-            log(f"Error splitting audio: {str(e)}")
+            log(f"Error detecting silences: {str(e)}")
             return []
     
+    def _silence_command(self, file_path, min_seconds=SILENCE_MIN_SECONDS):
+        """Build the ffmpeg silencedetect command for pauses of at least min_seconds"""
+        return [
+            "ffmpeg",
+            *self._input_args(file_path),
+            "-map", "0:a:0",
+            "-vn",
+            "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={min_seconds}",
+            "-f", "null",
+            "-"
+        ]
+    
+    def _parse_silences(self, stderr):
+        """Parse silencedetect output into (start, end) pairs"""
+        silences = []
+        silence_start = None
+        for line in stderr.splitlines():
+            match = re.search(r"silence_start: (-?[\d.]+)", line)
+            if match:
+                silence_start = max(0.0, float(match.group(1)))
+                continue
+            match = re.search(r"silence_end: ([\d.]+)", line)
+            if match and silence_start is not None:
+                silences.append((silence_start, float(match.group(1))))
+                silence_start = None
+        
+        log(f"Detected {len(silences)} silences")
+        return silences
+    
+    def _plan_chunk_boundaries(self, duration, chunk_size_seconds, silences):
+        """Plan chunk windows no longer than chunk_size_seconds
+        
+        Each cut is moved back to the middle of the latest pause within
+        SILENCE_SEARCH_SECONDS of the nominal cut. Where no pause is found, the
+        next window starts CHUNK_OVERLAP_SECONDS early so the words cut at the
+        boundary can be stitched back together when merging.
+        Returns a list of {"start", "end", "overlap"} dicts.
+        """
+        windows = []
+        start = 0.0
+        overlap = 0.0
+        
+        while True:
+            nominal_end = start + chunk_size_seconds
+            if nominal_end >= duration:
+                windows.append({"start": start, "end": duration, "overlap": overlap})
+                return windows
+            
+            # Don't shrink a chunk below half its size to reach a pause
+            earliest = max(start + chunk_size_seconds / 2, nominal_end - SILENCE_SEARCH_SECONDS)
+            candidates = [
+                (silence_start + silence_end) / 2
+                for silence_start, silence_end in silences
+                if earliest <= (silence_start + silence_end) / 2 <= nominal_end
+            ]
+            
+            if candidates:
+                cut = max(candidates)
+                windows.append({"start": start, "end": cut, "overlap": overlap})
+                start, overlap = cut, 0.0
+            else:
+                windows.append({"start": start, "end": nominal_end, "overlap": overlap})
+                overlap = min(CHUNK_OVERLAP_SECONDS, chunk_size_seconds / 2)
+                start = nominal_end - overlap
+    
+    async def _plan_chunk_encoding(self, file_path, chunk_size_seconds):
+        """Decide whether chunks can be cut by stream copy or must be re-encoded
+        
+        Returns (codec_args, extension, chunk_size_seconds). Stream copy is used
+        when the source codec is accepted by the API and copied chunks of a
+        reasonable length still fit under MAX_FILE_SIZE_MB; the chunk length is
+        shortened to fit if needed.
+        """
+        if not STREAM_COPY_CHUNKS:
+            return self._choose_chunk_encoding(None, chunk_size_seconds)
+        return self._choose_chunk_encoding(await self._probe(file_path), chunk_size_seconds)
+    
+    def _choose_chunk_encoding(self, media, chunk_size_seconds):
+        """Pick stream copy or re-encode for chunks given the file's probe"""
+        reencode = (["-c:a", "libmp3lame", "-q:a", "4"], ".mp3", chunk_size_seconds)
+        if not media:
+            return reencode
+        
+        codec = media.get("codec")
+        bit_rate = media.get("bit_rate")
+        extension = STREAM_COPY_FORMATS.get(codec)
+        if not extension or not bit_rate:
+            log(f"Source codec {codec} cannot be stream copied, re-encoding chunks")
+            return reencode
+        
+        # Leave some headroom for container overhead and bitrate variation
+        max_seconds = int(MAX_FILE_SIZE_MB * 1024 * 1024 * 8 * 0.9 / bit_rate)
+        if max_seconds < MIN_STREAM_COPY_CHUNK_SECONDS:
+            log(f"Source bitrate {bit_rate} bps too high for stream copy chunks, re-encoding")
+            return reencode
+        
+        copy_chunk_seconds = min(chunk_size_seconds, max_seconds)
+        log(f"Stream copying {codec} chunks of {copy_chunk_seconds} seconds into {extension}")
+        return (["-c:a", "copy"], extension, copy_chunk_seconds)
+    
+    def _segment_list_chunk(self, row, temp_dir, index):
+        """Turn one row of an ffmpeg CSV segment list into a chunk dict, or None for a malformed row
+        
+        Raises RuntimeError if the segment file is missing or empty; skipping
+        it would leave a hole in the transcript and shift every later chunk.
+        """
+        if len(row) < 3:
+            return None
+        chunk_path = os.path.join(temp_dir, os.path.basename(row[0]))
+        if not os.path.exists(chunk_path) or os.path.getsize(chunk_path) == 0:
+            raise RuntimeError(f"Segment {chunk_path} is missing or empty")
+        return {
+            "index": index,
+            "path": chunk_path,
+            "start": float(row[1]),
+            "end": float(row[2]),
+            "overlap": 0
+        }
+    
     def _merge_transcriptions(self, chunk_results):
-        """Merge transcription results from multiple chunks"""
+        """Merge transcription results from multiple chunks
+        
+        Chunks that start with an overlap are stitched onto the previous chunk
+        by aligning the words transcribed twice, so they are neither duplicated
+        nor lost at the join.
+        """
         if not chunk_results:
             return ""
             
         # Verbose JSON with segments that have timestamps
-        time_offset_ms = 0
         all_segments = []
-        merged_text = ""
+        has_segments = False
         language = None
         duration = 0
         
@@ -394,220 +2739,484 @@ class WhisperAPITranscriber:
             if "content" in chunk:
                 try:
                     content_json = json.loads(chunk["content"])
-                    time_offset_ms = int(chunk["time_offset"] * 1000)  # Convert to milliseconds
-                    
-                    # Collect text
-                    if "text" in content_json:
-                        merged_text += content_json["text"] + " "
+                    time_offset = chunk["time_offset"]
                     
                     # Get language from first chunk that has it
                     if language is None and "language" in content_json:
                         language = content_json["language"]
                     
-                    # Sum up durations
+                    # Overlapping chunks cover the same audio, so use the furthest end
                     if "duration" in content_json:
-                        duration += content_json["duration"]
+                        duration = max(duration, time_offset + content_json["duration"])
+                    
+                    # Process segments, falling back to the whole text as one segment
+                    if content_json.get("segments"):
+                        has_segments = True
+                        segments = content_json["segments"]
+                    else:
+                        segments = [{"start": 0, "end": content_json.get("duration", 0),
+                                     "text": content_json.get("text", "")}]
                     
-                    # Process segments
-                    if "segments" in content_json:
-                        for segment in content_json["segments"]:
-                            # Create simplified segment with adjusted timestamps
-                            simplified_segment = {
-                                "id": segment.get("id", 0),
-                                "start": segment.get("start", 0) + time_offset_ms/1000,
-                                "end": segment.get("end", 0) + time_offset_ms/1000,
-                                "text": segment.get("text", "")
-                            }
+                    chunk_segments = []
+                    for segment in segments:
+                        # Create simplified segment with adjusted timestamps
+                        simplified_segment = {
+                            "id": segment.get("id", 0),
+                            "start": segment.get("start", 0) + time_offset,
+                            "end": segment.get("end", 0) + time_offset,
+                            "text": segment.get("text", "")
+                        }
+                        
+                        # Optionally add seek if it exists
+                        if "seek" in segment:
+                            simplified_segment["seek"] = segment["seek"]
                             
-                            # Optionally add seek if it exists
-                            if "seek" in segment:
-                                simplified_segment["seek"] = segment["seek"]
-                                
-                            all_segments.append(simplified_segment)
+                        chunk_segments.append(simplified_segment)
+                    
+                    if chunk.get("overlap") and all_segments:
+                        self._stitch_overlap(
+                            all_segments, chunk_segments,
+                            time_offset, time_offset + chunk["overlap"]
+                        )
+                    all_segments.extend(chunk_segments)
                 except json.JSONDecodeError:
                     log(f"Warning: Could not parse JSON content from chunk")
         
+        merged_text = " ".join(
+            segment["text"].strip() for segment in all_segments if segment["text"].strip()
+        )
+        
         # Create final verbose JSON with all segments
         result = {
-            "text": merged_text.strip(),
+            "text": merged_text,
             "language": language or "Unknown",
             "duration": duration,
-            "segments": all_segments
+            "segments": all_segments if has_segments else []
         }
         
         return json.dumps(result, indent=2)
     
+    def _stitch_overlap(self, previous_segments, segments, overlap_start, overlap_end):
+        """Remove the words transcribed twice across an overlapping chunk boundary
+        
+        Finds the longest run of words shared by the end of the previous chunk
+        and the start of this one. Words after that run are taken from this
+        chunk, since the previous chunk's audio was cut mid-word there.
+        Falls back to splitting at the middle of the overlap when no run matches.
+        Both segment lists are edited in place.
+        """
+        def words_of(segment_list):
+            # (segment position, word) pairs in reading order
+            return [(i, word) for i, segment in enumerate(segment_list)
+                    for word in segment["text"].split()]
+        
+        def normalize(word):
+            return re.sub(r"[^\w']", "", word.lower())
+        
+        # Only consider segments that touch the overlapping stretch of audio
+        tail_from = next(
+            (i for i, segment in enumerate(previous_segments) if segment["end"] > overlap_start - 1),
+            len(previous_segments)
+        )
+        head_to = next(
+            (i for i, segment in enumerate(segments) if segment["start"] > overlap_end + 1),
+            len(segments)
+        )
+        tail_words = words_of(previous_segments[tail_from:])
+        head_words = words_of(segments[:head_to])
+        
+        matcher = difflib.SequenceMatcher(
+            None,
+            [normalize(word) for _, word in tail_words],
+            [normalize(word) for _, word in head_words],
+            autojunk=False
+        )
+        match = matcher.find_longest_match(0, len(tail_words), 0, len(head_words))
+        
+        if match.size >= 2:
+            drop_tail = len(tail_words) - (match.a + match.size)
+            drop_head = match.b + match.size
+            log(f"Stitched overlap on {match.size} words, dropping {drop_tail} + {drop_head} repeated words")
+        else:
+            # No reliable alignment: keep each side's words up to the middle of the overlap
+            middle = (overlap_start + overlap_end) / 2
+            drop_tail = sum(len(segment["text"].split())
+                            for segment in previous_segments[tail_from:] if segment["start"] >= middle)
+            drop_head = sum(len(segment["text"].split())
+                            for segment in segments[:head_to]
+                            if (segment["start"] + segment["end"]) / 2 < middle)
+            log(f"No word alignment in overlap, splitting at {middle:.2f} seconds")
+        
+        self._drop_words(previous_segments, drop_tail, from_end=True)
+        self._drop_words(segments, drop_head, from_end=False)
+    
+    def _drop_words(self, segments, count, from_end):
+        """Drop count words from the start or end of a segment list, removing emptied segments"""
+        while count > 0 and segments:
+            position = -1 if from_end else 0
+            words = segments[position]["text"].split()
+            if len(words) <= count:
+                count -= len(words)
+                segments.pop(position)
+                continue
+            kept = words[:-count] if from_end else words[count:]
+            segments[position]["text"] = " " + " ".join(kept)
+            count = 0
+    
     def download_youtube(self, youtube_link):
-        """Download a YouTube video's audio and return the path to the file"""
+        """Download a YouTube video's audio and return the path to the file
+        
+        Audio already in the YouTube audio cache is linked into place instead
+        of being downloaded again. The caller removes the returned temp_dir.
+        """
+        return run_sync(self._download_youtube(youtube_link))
+    
+    async def _download_youtube(self, youtube_link):
+        """Link a video's audio out of the cache or download it with yt-dlp for download_youtube"""
+        temp_dir = None
+        result = None
         try:
             # Create temporary directory for the downloads
-            temp_dir = tempfile.mkdtemp()
-            temp_filename = f"youtube_audio_{int(time.time())}.mp3"
-            temp_path = os.path.join(temp_dir, temp_filename)
+            temp_dir = self._youtube_temp_dir()
+            temp_base = os.path.join(temp_dir, f"youtube_audio_{int(time.time())}")
+            
+            cache_key = self._youtube_cache_key(youtube_link)
+            if cache_key:
+                # Linking, or copying on another filesystem, blocks, so the async engine does it in a worker thread
+                cached = await self._run_blocking(self.youtube_cache.get, cache_key, temp_base)
+                if cached:
+                    log(f"YouTube audio cache hit for {cache_key}")
+                    result = await self._run_blocking(
+                        self._cached_youtube_download, youtube_link, *cached, temp_dir
+                    )
+                    return result
             
             log(f"Attempting to download YouTube video: {youtube_link}")
-            log(f"Temporary file path: {temp_path}")
+            log(f"Temporary file path: {temp_base}.*")
             
-            # Get video title and thumbnail using direct extraction
+            # Fall back to the thumbnail URL built from the video ID if extraction fails
             video_title = "YouTube Video"
-            thumbnail_url = None
-            
-            # Extract video ID from URL
-            import re
-            video_id = None
-            patterns = [
-                r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([^&\s]+)',
-                r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([^\?\s]+)',
-                r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([^\?\s]+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, youtube_link)
-                if match:
-                    video_id = match.group(1)
-                    break
-            
-            if video_id:
-                thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
-                log(f"Generated thumbnail URL from video ID: {thumbnail_url}")
+            thumbnail_url = self._youtube_thumbnail_url(youtube_link)
             
             # Try to use yt-dlp with error handling
             try:
-                log("Getting YouTube metadata with yt-dlp...")
-                # Use a more resilient command line approach for Windows
-                import subprocess
-                
-                # Add python executable to ensure proper environment
-                python_exe = sys.executable  # Get the current Python executable
-                
-                # Use Python to run yt-dlp as a module
-                title_cmd = [
-                    python_exe, "-m", "yt_dlp", 
-                    "--skip-download",
-                    "--print", "title",
-                    youtube_link
-                ]
-                
-                # Set shell=True on Windows for better path handling
-                use_shell = os.name == 'nt'
-                
-                title_process = subprocess.run(
-                    title_cmd,
-                    capture_output=True,
-                    text=True,
-                    check=False,  # Don't raise exception on non-zero exit
-                    shell=use_shell
-                )
-                
-                if title_process.returncode == 0:
-                    video_title = title_process.stdout.strip()
-                    log(f"Video title from yt-dlp: {video_title}")
-                else:
-                    log(f"Error getting title with yt-dlp: {title_process.stderr}")
-                    log(f"Return code: {title_process.returncode}")
-                    # Continue with default title
-                
-                # Download the audio
-                log("Running yt-dlp to download audio...")
-                
-                # Use Python to run yt-dlp as a module for download
-                download_cmd = [
-                    python_exe, "-m", "yt_dlp", 
-                    "--verbose",
-                    "--extract-audio",
-                    "--audio-format", "mp3",
-                    "--audio-quality", "0",
-                    "-o", temp_path,
-                    youtube_link
-                ]
-                
-                download_process = subprocess.run(
-                    download_cmd,
-                    capture_output=True,
-                    text=True,
-                    check=False,
-                    shell=use_shell
+                log("Extracting and downloading YouTube audio with yt-dlp...")
+                # yt-dlp blocks, so the async engine runs it in a worker thread
+                info = await self._run_blocking(
+                    self._extract_youtube, youtube_link, self._youtube_download_options(temp_base)
                 )
-                
-                if download_process.returncode != 0:
-                    log(f"yt-dlp download error: {download_process.stderr}")
-                    log(f"Return code: {download_process.returncode}")
-                    raise subprocess.CalledProcessError(
-                        download_process.returncode, 
-                        download_cmd,
-                        download_process.stdout,
-                        download_process.stderr
-                    )
-                    
-                log("yt-dlp download completed successfully")
+                video_title, thumbnail_url = self._youtube_metadata(info, video_title, thumbnail_url)
+                temp_path = self._youtube_download_path(info, temp_base)
+                log(f"yt-dlp download completed successfully: {temp_path}")
                 
             except Exception as e:
                 log(f"Error using yt-dlp: {str(e)}")
-                # If we have a thumbnail but download failed, return error
-                if thumbnail_url:
-                    return {
-                        "error": f"Failed to download YouTube audio: {str(e)}",
-                        "title": video_title,
-                        "thumbnail_url": thumbnail_url
-                    }
-                else:
-                    return {"error": f"Failed to process YouTube video: {str(e)}"}
+                result = self._youtube_download_error(e, video_title, thumbnail_url)
+                return result
                     
-            # Wait a moment to ensure file is fully written
-            time.sleep(2)
-            
-            # Check if file exists and has content
-            if not os.path.exists(temp_path):
-                log(f"Error: File does not exist at {temp_path}")
-                # Look for any file that might have been created
-                files = os.listdir(temp_dir)
-                log(f"Files in temp directory: {files}")
+            # extract_info only returns once yt-dlp has written and closed the final file
+            result = self._youtube_download_result(temp_dir, temp_path, video_title, thumbnail_url)
+            if YOUTUBE_AUDIO_FORMAT == "speech" and "error" not in result:
+                result = await self._transcode_youtube_download(result)
+            await self._run_blocking(self._cache_youtube_download, youtube_link, cache_key, result)
+            return result
                 
-                if files:
-                    # Use the first file we find
-                    temp_path = os.path.join(temp_dir, files[0])
-                    log(f"Using alternative file: {temp_path}")
-                else:
-                    # Return thumbnail and title even if download failed
-                    if thumbnail_url:
-                        return {
-                            "error": "Failed to download YouTube video - no file created",
-                            "title": video_title,
-                            "thumbnail_url": thumbnail_url
-                        }
-                    else:
-                        return {"error": "Failed to download YouTube video - no file created"}
+        except Exception as e:
+            log(f"Error downloading YouTube video: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": f"Failed to process YouTube video: {str(e)}"}
+        finally:
+            # The caller only gets temp_dir, to remove, along with a download
+            if temp_dir and (result is None or "error" in result):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _youtube_temp_dir(self):
+        """Create a download directory, next to the audio cache when there is one
+        
+        On the cache's filesystem, storing and serving cache entries are hard
+        links instead of copies of the whole file.
+        """
+        if not self.youtube_cache:
+            return tempfile.mkdtemp()
+        return tempfile.mkdtemp(dir=self.youtube_cache.download_dir)
+    
+    def expand_youtube(self, youtube_link):
+        """List the videos behind a playlist or channel link, without downloading them
+        
+        Returns {"title", "videos"}, where videos is a list of {"url", "title"}
+        dicts in playlist order, or None if the link is a single video or
+        cannot be listed. Links naming a video ID are always single videos.
+        """
+        if self._youtube_video_id(youtube_link):
+            return None
+        
+        try:
+            info = self._extract_youtube(youtube_link, self._youtube_playlist_options())
+            if info.get("_type") != "playlist":
+                return None
             
-            file_size = os.path.getsize(temp_path)
-            log(f"Downloaded file size: {file_size} bytes")
+            videos = self._playlist_videos(info)
+            log(f"Expanded {youtube_link} into {len(videos)} videos")
+            return {"title": info.get("title") or "YouTube Playlist", "videos": videos}
             
-            if file_size == 0:
-                if thumbnail_url:
-                    return {
-                        "error": "Downloaded file is empty (0 bytes)",
-                        "title": video_title,
-                        "thumbnail_url": thumbnail_url
-                    }
-                else:
-                    return {"error": "Downloaded file is empty (0 bytes)"}
-                    
+        except Exception as e:
+            log(f"Could not list videos of {youtube_link}, treating it as a single video: {str(e)}")
+            return None
+    
+    def _youtube_playlist_options(self):
+        """yt-dlp options listing a playlist's entries without resolving each video"""
+        return {
+            "skip_download": True,
+            "extract_flat": "in_playlist",
+            "playlistend": YOUTUBE_PLAYLIST_MAX_VIDEOS,
+            "logger": YtDlpLogger(),
+        }
+    
+    def _playlist_videos(self, info, depth=0):
+        """Collect {"url", "title"} for the videos of flat playlist info
+        
+        Channel pages list their tabs (Videos, Shorts, Live) as nested
+        playlists, so those are listed one level down.
+        """
+        videos = []
+        for entry in info.get("entries") or []:
+            if not entry:
+                continue
+            if entry.get("ie_key") == "YoutubeTab" and depth == 0:
+                tab = self._extract_youtube(entry["url"], self._youtube_playlist_options())
+                videos.extend(self._playlist_videos(tab, depth + 1))
+            elif entry.get("_type") == "playlist" and depth == 0:
+                videos.extend(self._playlist_videos(entry, depth + 1))
+            elif entry.get("url"):
+                videos.append({"url": entry["url"], "title": entry.get("title") or "YouTube Video"})
+            if len(videos) >= YOUTUBE_PLAYLIST_MAX_VIDEOS:
+                break
+        return videos[:YOUTUBE_PLAYLIST_MAX_VIDEOS]
+    
+    def youtube_info(self, youtube_link):
+        """Get a YouTube video's title and thumbnail without downloading any media
+        
+        Results are cached in memory by video ID (or by URL for links without
+        a recognizable ID) for YOUTUBE_INFO_TTL_SECONDS, so pasting the same
+        link again does not query YouTube.
+        """
+        try:
+            cache_key = self._youtube_video_id(youtube_link) or youtube_link
+            cached_info = get_cached_youtube_info(cache_key)
+            if cached_info is not None:
+                log(f"YouTube info cache hit for {cache_key}")
+                return cached_info
+            
+            video_title = "YouTube Video"
+            thumbnail_url = self._youtube_thumbnail_url(youtube_link)
+            try:
+                info = self._extract_youtube(youtube_link, self._youtube_info_options())
+            except Exception as e:
+                log(f"Error using yt-dlp: {str(e)}")
+                return self._youtube_download_error(e, video_title, thumbnail_url)
+            
+            video_title, thumbnail_url = self._youtube_metadata(info, video_title, thumbnail_url)
+            result = {"title": video_title, "thumbnail_url": thumbnail_url}
+            cache_youtube_info(cache_key, result)
+            return result
+            
+        except Exception as e:
+            log(f"Error getting YouTube info: {str(e)}")
+            log(traceback.format_exc())
+            return {"error": f"Failed to process YouTube video: {str(e)}"}
+    
+    def _youtube_info_options(self):
+        """yt-dlp options extracting a single video's metadata without downloading
+        
+        Playlist and channel links only have their own page read: entries are
+        left unresolved and listing stops at the first one.
+        """
+        return {
+            "skip_download": True,
+            "noplaylist": True,
+            "extract_flat": "in_playlist",
+            "playlistend": 1,
+            "logger": YtDlpLogger(),
+        }
+    
+    def _youtube_video_id(self, youtube_link):
+        """Extract the video ID from a YouTube link, or None if there is none"""
+        patterns = [
+            r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/watch\?v=([^&\s]+)',
+            r'(?:https?:\/\/)?(?:www\.)?youtu\.be\/([^\?\s]+)',
+            r'(?:https?:\/\/)?(?:www\.)?youtube\.com\/embed\/([^\?\s]+)'
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, youtube_link)
+            if match:
+                return match.group(1)
+        return None
+    
+    def _youtube_thumbnail_url(self, youtube_link):
+        """Build the thumbnail URL from the video ID in a YouTube link, if there is one"""
+        video_id = self._youtube_video_id(youtube_link)
+        if not video_id:
+            return None
+        
+        thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
+        log(f"Generated thumbnail URL from video ID: {thumbnail_url}")
+        return thumbnail_url
+    
+    def _youtube_cache_key(self, youtube_link):
+        """Key of a video's audio in the YouTube audio cache, or None if it can't be cached"""
+        video_id = self._youtube_video_id(youtube_link)
+        if not self.youtube_cache or not video_id:
+            return None
+        return f"{video_id}_{YOUTUBE_AUDIO_FORMAT}"
+    
+    def _cached_youtube_download(self, youtube_link, file_path, metadata, temp_dir):
+        """Build the download result for audio served from the YouTube audio cache
+        
+        The title and thumbnail come from the metadata stored with the audio;
+        only entries cached without it fall back to youtube_info.
+        """
+        info = metadata or self.youtube_info(youtube_link)
+        return {
+            "file_path": file_path,
+            "title": info.get("title", "YouTube Video"),
+            "thumbnail_url": info.get("thumbnail_url", self._youtube_thumbnail_url(youtube_link)),
+            "temp_dir": temp_dir
+        }
+    
+    def _cache_youtube_download(self, youtube_link, cache_key, result):
+        """Keep a successful download's audio and metadata for repeat requests"""
+        if not cache_key or "error" in result:
+            return
+        try:
+            metadata = {"title": result["title"], "thumbnail_url": result["thumbnail_url"]}
+            self.youtube_cache.put(cache_key, result["file_path"], metadata)
+            cache_youtube_info(self._youtube_video_id(youtube_link), metadata)
+        except Exception as e:
+            log(f"Warning: Failed to cache YouTube audio: {str(e)}")
+    
+    def _extract_youtube(self, youtube_link, options):
+        """Run one in-process yt-dlp extraction, downloading too unless options say otherwise
+        
+        Raises yt_dlp's DownloadError if the video cannot be extracted or downloaded.
+        """
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.extract_info(youtube_link, download=not options.get("skip_download"))
+    
+    def _youtube_download_options(self, temp_base):
+        """yt-dlp options downloading a single video's audio to temp_base plus its extension
+        
+        In "mp3" format the best audio is converted to MP3. Otherwise the
+        smallest audio-only stream is kept in its own container, which the
+        API accepts as-is.
+        """
+        options = {
+            "format": YOUTUBE_NATIVE_FORMAT,
+            "outtmpl": f"{temp_base}.%(ext)s",
+            "noplaylist": True,
+            "concurrent_fragment_downloads": YOUTUBE_CONCURRENT_FRAGMENTS,
+            "noprogress": True,
+            "logger": YtDlpLogger(),
+        }
+        if YOUTUBE_AUDIO_FORMAT == "mp3":
+            options["format"] = "bestaudio/best"
+            options["postprocessors"] = [{
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "0",
+            }]
+        return options
+    
+    def _youtube_download_path(self, info, temp_base):
+        """Path of the file yt-dlp wrote for a download, after any post-processing"""
+        downloads = info.get("requested_downloads") or []
+        if downloads and downloads[0].get("filepath"):
+            return downloads[0]["filepath"]
+        return f"{temp_base}.{info.get('ext', 'mp3')}"
+    
+    async def _transcode_youtube_download(self, result):
+        """Re-encode downloaded audio to 16 kHz mono Opus, keeping the original if that fails"""
+        cmd, output_path = self._fit_command(
+            result["file_path"], tempfile.mkdtemp(dir=result["temp_dir"]), SPEECH_MAX_BITRATE_KBPS
+        )
+        process = await self._run_command(cmd)
+        if process.returncode != 0:
+            log(f"ffmpeg error: {process.stderr}")
+            return result
+        
+        os.remove(result["file_path"])
+        result["file_path"] = output_path
+        return result
+    
+    def _youtube_metadata(self, info, default_title, default_thumbnail):
+        """Read the title and thumbnail URL from yt-dlp info, keeping the defaults if missing"""
+        video_title = info.get("title") or default_title
+        # Playlists and channels only carry a list of thumbnails, largest last
+        thumbnails = info.get("thumbnails") or [{}]
+        thumbnail_url = info.get("thumbnail") or thumbnails[-1].get("url") or default_thumbnail
+        log(f"Video title from yt-dlp: {video_title}")
+        return video_title, thumbnail_url
+    
+    def _youtube_download_error(self, error, video_title, thumbnail_url):
+        """Build the error result for a failed yt-dlp run"""
+        # If we have a thumbnail but download failed, return error
+        if thumbnail_url:
             return {
-                "file_path": temp_path,
+                "error": f"Failed to download YouTube audio: {str(error)}",
                 "title": video_title,
-                "thumbnail_url": thumbnail_url,
-                "temp_dir": temp_dir
+                "thumbnail_url": thumbnail_url
             }
+        else:
+            return {"error": f"Failed to process YouTube video: {str(error)}"}
+    
+    def _youtube_download_result(self, temp_dir, temp_path, video_title, thumbnail_url):
+        """Validate the file yt-dlp reported writing, returning the download result"""
+        # Check if file exists and has content
+        if not os.path.exists(temp_path):
+            log(f"Error: File does not exist at {temp_path}")
+            # Return thumbnail and title even if download failed
+            if thumbnail_url:
+                return {
+                    "error": "Failed to download YouTube video - no file created",
+                    "title": video_title,
+                    "thumbnail_url": thumbnail_url
+                }
+            else:
+                return {"error": "Failed to download YouTube video - no file created"}
+        
+        file_size = os.path.getsize(temp_path)
+        log(f"Downloaded file size: {file_size} bytes")
+        
+        if file_size == 0:
+            if thumbnail_url:
+                return {
+                    "error": "Downloaded file is empty (0 bytes)",
+                    "title": video_title,
+                    "thumbnail_url": thumbnail_url
+                }
+            else:
+                return {"error": "Downloaded file is empty (0 bytes)"}
                 
-        except Exception as e:
-            log(f"Error downloading YouTube video: {str(e)}")
-            log(traceback.format_exc())
-            return {"error": f"Failed to process YouTube video: {str(e)}"}
+        return {
+            "file_path": temp_path,
+            "title": video_title,
+            "thumbnail_url": thumbnail_url,
+            "temp_dir": temp_dir
+        }
     
     def transcribe_youtube(self, youtube_link, model, language=None, 
-                      translate=False, timestamp=True):
+                      translate=False, timestamp=True, mode="standard", remove_silence=False,
+                      speedup=1.0):
         """Download a YouTube video and transcribe its audio"""
+        return run_sync(self._transcribe_youtube(
+            youtube_link, model, language, translate, timestamp, mode, remove_silence, speedup
+        ))
+    
+    async def _transcribe_youtube(self, youtube_link, model, language, translate, timestamp, mode,
+                                  remove_silence, speedup):
+        """Download a video's audio and transcribe it for transcribe_youtube"""
         try:
-            download_result = self.download_youtube(youtube_link)
+            download_result = await self._download_youtube(youtube_link)
             
             if "error" in download_result:
                 return download_result
@@ -619,15 +3228,12 @@ class WhisperAPITranscriber:
             
             # Transcribe the downloaded audio
             log(f"Starting transcription of downloaded file: {temp_path}")
-            transcription_result = self.transcribe_file(
-                temp_path, model, language, 
-                translate, timestamp
+            transcription_result = await self._transcribe_cached(
+                temp_path, model, language, translate, timestamp, None, mode, remove_silence, speedup
             )
             
-            # Clean up - wait a moment to ensure file is not in use
-            time.sleep(2)
+            # Clean up - transcription has finished with the file by now
             try:
-                import shutil
                 shutil.rmtree(temp_dir, ignore_errors=True)
                 log(f"Temporary directory removed: {temp_dir}")
             except Exception as cleanup_error:
@@ -643,4 +3249,4 @@ class WhisperAPITranscriber:
         except Exception as e:
             log(f"Error in transcribe_youtube: {str(e)}")
             log(traceback.format_exc())
-            return {"error": f"Failed to process YouTube video: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Failed to process YouTube video: {str(e)}"}